@@ -0,0 +1,62 @@
+"""Add employees_fts full-text search index
+
+Revision ID: 3c1f9e2b8d47
+Revises: 7a2d90cc58d5
+Create Date: 2026-10-17 10:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9e2b8d47'
+down_revision: Union[str, Sequence[str], None] = '7a2d90cc58d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = [
+    "name", "father_name", "mother_name", "employee_code", "email",
+    "official_email", "phone", "current_city", "permanent_city",
+]
+COLUMNS = ", ".join(SEARCH_COLUMNS)
+NEW_VALUES = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+OLD_VALUES = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5({COLUMNS}, "
+        "content='employees', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS employees_fts_ai AFTER INSERT ON employees BEGIN
+            INSERT INTO employees_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+        END"""
+    )
+    op.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS employees_fts_ad AFTER DELETE ON employees BEGIN
+            INSERT INTO employees_fts(employees_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+        END"""
+    )
+    op.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS employees_fts_au AFTER UPDATE OF {COLUMNS} ON employees BEGIN
+            INSERT INTO employees_fts(employees_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+            INSERT INTO employees_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+        END"""
+    )
+    op.execute("INSERT INTO employees_fts(employees_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS employees_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS employees_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS employees_fts_ai")
+    op.execute("DROP TABLE IF EXISTS employees_fts")
@@ -0,0 +1,31 @@
+"""Add indexes for the bank detail, work experience and education list order
+
+Revision ID: 4f6b2d8e0a17
+Revises: e2a8c6f4d351
+Create Date: 2026-10-17 21:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f6b2d8e0a17'
+down_revision: Union[str, Sequence[str], None] = 'e2a8c6f4d351'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SORTED_LISTS = [("bank_details", "account_type"), ("work_experiences", "start_date"), ("educations", "start_date")]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in SORTED_LISTS:
+        op.create_index(f"ix_{table}_is_active_{column}", table, ["is_active", column, "id"], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in reversed(SORTED_LISTS):
+        op.drop_index(f"ix_{table}_is_active_{column}", table_name=table, if_exists=True)
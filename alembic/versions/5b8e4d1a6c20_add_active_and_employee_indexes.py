@@ -0,0 +1,49 @@
+"""Add is_active and employee_id composite indexes
+
+Revision ID: 5b8e4d1a6c20
+Revises: 3c1f9e2b8d47
+Create Date: 2026-10-17 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e4d1a6c20'
+down_revision: Union[str, Sequence[str], None] = '3c1f9e2b8d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_ROWS_TABLES = [
+    "companies", "projects", "employees", "employee_profiles",
+    "bank_details", "documents", "work_experiences", "educations",
+]
+EMPLOYEE_ROWS_TABLES = ["employee_profiles", "bank_details", "documents", "work_experiences", "educations"]
+PROFILE_FILTER_COLUMNS = ["branch_id", "department_id", "grade_id"]
+
+
+def _indexes():
+    for table in ACTIVE_ROWS_TABLES:
+        yield f"ix_{table}_is_active", table, ["is_active", "id", "updated_at", "created_at"]
+    for table in EMPLOYEE_ROWS_TABLES:
+        yield f"ix_{table}_employee_id_is_active", table, ["employee_id", "is_active"]
+    for column in PROFILE_FILTER_COLUMNS:
+        yield f"ix_employee_profiles_{column}_is_active", "employee_profiles", [column, "is_active", "employee_id"]
+    yield "ix_employee_profiles_is_active_reporting_manager_id", "employee_profiles", ["is_active", "employee_id", "reporting_manager_id"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in _indexes():
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+    if op.get_bind().dialect.name == "sqlite":
+        # fresh statistics so the planner weighs the new indexes correctly
+        op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(list(_indexes())):
+        op.drop_index(name, table_name=table, if_exists=True)
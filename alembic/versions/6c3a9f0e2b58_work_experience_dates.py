@@ -0,0 +1,52 @@
+"""Store work_experiences start_date/end_date as dates
+
+Revision ID: 6c3a9f0e2b58
+Revises: 4f6b2d8e0a17
+Create Date: 2026-10-17 23:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c3a9f0e2b58'
+down_revision: Union[str, Sequence[str], None] = '4f6b2d8e0a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The models declare Date; databases from before the baseline still have DATETIME.
+COLUMNS = ("start_date", "end_date")
+
+
+def _retype(from_type, to_type):
+    if op.get_bind().dialect.name != "sqlite":
+        for column in COLUMNS:
+            op.alter_column("work_experiences", column, existing_type=from_type, type_=to_type, existing_nullable=True)
+        return
+    # A batch alter_column would copy the rows through CAST(... AS DATE), which has
+    # numeric affinity on SQLite and turns '2020-01-02 ...' into 2020. Reflecting
+    # the columns with the new type rebuilds the table and copies values as they are.
+    with op.batch_alter_table(
+        "work_experiences", recreate="always", reflect_args=[sa.Column(column, to_type) for column in COLUMNS]
+    ):
+        pass
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _retype(sa.DateTime(), sa.Date())
+    if op.get_bind().dialect.name == "sqlite":
+        # drop the " 00:00:00.000000" left by DATETIME so values compare as dates
+        for column in COLUMNS:
+            op.execute(f"UPDATE work_experiences SET {column} = date({column}) WHERE {column} IS NOT NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        for column in COLUMNS:
+            op.execute(f"UPDATE work_experiences SET {column} = strftime('%Y-%m-%d %H:%M:%f000', {column}) WHERE {column} IS NOT NULL")
+    _retype(sa.Date(), sa.DateTime())
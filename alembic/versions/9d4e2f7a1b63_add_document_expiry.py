@@ -0,0 +1,40 @@
+"""Add documents expiry index and document_expiry_buckets summary table
+
+Revision ID: 9d4e2f7a1b63
+Revises: 5b8e4d1a6c20
+Create Date: 2026-10-17 16:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4e2f7a1b63'
+down_revision: Union[str, Sequence[str], None] = '5b8e4d1a6c20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_documents_is_active_expiry_date", "documents", ["is_active", "expiry_date"], unique=False, if_not_exists=True)
+    op.create_table(
+        "document_expiry_buckets",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("document_type_id", sa.Integer(), nullable=False),
+        sa.Column("bucket", sa.String(), nullable=False),
+        sa.Column("documents", sa.Integer(), nullable=False),
+        sa.Column("as_of", sa.Date(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.ForeignKeyConstraint(["document_type_id"], ["document_types.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("document_expiry_buckets")
+    op.drop_index("ix_documents_is_active_expiry_date", table_name="documents", if_exists=True)
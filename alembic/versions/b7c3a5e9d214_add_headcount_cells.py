@@ -0,0 +1,48 @@
+"""Add headcount_cells aggregate table and employee joining/leaving date indexes
+
+Revision ID: b7c3a5e9d214
+Revises: 9d4e2f7a1b63
+Create Date: 2026-10-17 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c3a5e9d214'
+down_revision: Union[str, Sequence[str], None] = '9d4e2f7a1b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f("ix_employees_date_of_joining"), "employees", ["date_of_joining"], unique=False, if_not_exists=True)
+    op.create_index(op.f("ix_employees_date_of_leaving"), "employees", ["date_of_leaving"], unique=False, if_not_exists=True)
+    op.create_table(
+        "headcount_cells",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("branch_id", sa.Integer(), nullable=False),
+        sa.Column("department_id", sa.Integer(), nullable=False),
+        sa.Column("designation_id", sa.Integer(), nullable=False),
+        sa.Column("grade_id", sa.Integer(), nullable=False),
+        sa.Column("employee_type_id", sa.Integer(), nullable=False),
+        sa.Column("headcount", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["branch_id"], ["branches.id"]),
+        sa.ForeignKeyConstraint(["department_id"], ["departments.id"]),
+        sa.ForeignKeyConstraint(["designation_id"], ["designations.id"]),
+        sa.ForeignKeyConstraint(["grade_id"], ["grades.id"]),
+        sa.ForeignKeyConstraint(["employee_type_id"], ["employee_types.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("branch_id", "department_id", "designation_id", "grade_id", "employee_type_id", name="uq_headcount_cells_dimensions"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("headcount_cells")
+    op.drop_index(op.f("ix_employees_date_of_leaving"), table_name="employees", if_exists=True)
+    op.drop_index(op.f("ix_employees_date_of_joining"), table_name="employees", if_exists=True)
@@ -0,0 +1,29 @@
+"""Add employee_profiles.salary
+
+Revision ID: e2a8c6f4d351
+Revises: b7c3a5e9d214
+Create Date: 2026-10-17 19:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a8c6f4d351'
+down_revision: Union[str, Sequence[str], None] = 'b7c3a5e9d214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("employee_profiles", sa.Column("salary", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("employee_profiles") as batch_op:
+        batch_op.drop_column("salary")
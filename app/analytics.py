@@ -0,0 +1,166 @@
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+
+from .models import Employee, EmployeeProfile, HeadcountCell
+
+# Dashboard dimensions, all taken from the employee's profile
+DIMENSIONS = ("branch", "department", "designation", "grade", "employee_type")
+CELL_COLUMNS = tuple(f"{name}_id" for name in DIMENSIONS)
+PERIODS = ("day", "month", "year")
+
+
+def _profile_columns(names):
+    return [getattr(EmployeeProfile, f"{name}_id") for name in names]
+
+
+def in_headcount():
+    # who is in the headcount: an active employee with an active profile
+    return and_(Employee.is_active == True, EmployeeProfile.is_active == True)
+
+
+########################################## headcount_cells ##########################################
+# One row per combination of the five dimensions with its headcount. Headcount by
+# any subset of dimensions is a SUM over these rows, so dashboard reads don't
+# depend on the number of employees. The sync profile/employee handlers keep the
+# rows current inside their own transaction (HeadcountChange); rebuild_headcount
+# recomputes them from scratch at startup, which also covers writes made through
+# the async CRUD routes.
+
+def rebuild_headcount(engine):
+    cells = (
+        select(*_profile_columns(DIMENSIONS), func.count())
+        .join(Employee, Employee.id == EmployeeProfile.employee_id)
+        .where(in_headcount())
+        .group_by(*_profile_columns(DIMENSIONS))
+    )
+    with engine.begin() as connection:
+        connection.execute(delete(HeadcountCell))
+        connection.execute(insert(HeadcountCell).from_select([*CELL_COLUMNS, "headcount"], cells))
+
+
+def _current_cells(db, employee_ids):
+    rows = (
+        db.query(*_profile_columns(DIMENSIONS))
+        .join(Employee, Employee.id == EmployeeProfile.employee_id)
+        .filter(EmployeeProfile.employee_id.in_(employee_ids), in_headcount())
+    )
+    return Counter(tuple(row) for row in rows)
+
+
+UPSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+def _adjust(db, cell, delta):
+    values = dict(zip(CELL_COLUMNS, cell))
+    upsert = UPSERTS.get(db.get_bind().dialect.name)
+    if upsert is not None:
+        # one statement, and two writers creating the same cell can't both insert it
+        stmt = upsert(HeadcountCell).values(**values, headcount=delta)
+        db.execute(stmt.on_conflict_do_update(index_elements=list(CELL_COLUMNS), set_={"headcount": HeadcountCell.headcount + delta}))
+        return
+    match = [getattr(HeadcountCell, column) == value for column, value in values.items()]
+    updated = db.execute(update(HeadcountCell).where(*match).values(headcount=HeadcountCell.headcount + delta))
+    if updated.rowcount == 0:
+        db.add(HeadcountCell(**values, headcount=delta))
+
+
+class HeadcountChange:
+    """Snapshot what the given employees contribute to headcount_cells, then after the
+    handler's changes, apply() moves the difference. Call apply() before the commit."""
+
+    def __init__(self, db, *employee_ids):
+        self.db = db
+        self.employee_ids = {employee_id for employee_id in employee_ids if employee_id is not None}
+        self.before = _current_cells(db, self.employee_ids)
+
+    def apply(self):
+        self.db.flush()
+        after = _current_cells(self.db, self.employee_ids)
+        for cell, count in (after - self.before).items():
+            _adjust(self.db, cell, count)
+        for cell, count in (self.before - after).items():
+            _adjust(self.db, cell, -count)
+
+
+########################################## reads ##########################################
+
+def headcount(db, by=(), live=False):
+    """Headcount grouped by the given dimensions; live=True runs the GROUP BY over
+    employees and profiles instead of reading headcount_cells."""
+    keys = [f"{name}_id" for name in by]
+    if live:
+        columns = _profile_columns(by)
+        query = (
+            db.query(*columns, func.count())
+            .select_from(EmployeeProfile)
+            .join(Employee, Employee.id == EmployeeProfile.employee_id)
+            .filter(in_headcount())
+        )
+    else:
+        columns = [getattr(HeadcountCell, key) for key in keys]
+        query = db.query(*columns, func.sum(HeadcountCell.headcount)).having(func.sum(HeadcountCell.headcount) > 0)
+    rows = query.group_by(*columns).order_by(*columns).all() if columns else query.all()
+    groups = [{**dict(zip(keys, row[:-1])), "headcount": row[-1]} for row in rows if row[-1]]
+    return {"by": list(by), "total": sum(group["headcount"] for group in groups), "groups": groups}
+
+
+def _latest_profile():
+    # leavers' profiles are usually deactivated, so movements are attributed to the
+    # employee's most recent profile, active or not
+    profile = aliased(EmployeeProfile)
+    latest = select(func.max(profile.id)).where(profile.employee_id == Employee.id).scalar_subquery()
+    return EmployeeProfile.id == latest
+
+
+def _period_key(value, period):
+    if value is None:
+        return None
+    if period == "year":
+        return f"{value.year:04d}"
+    if period == "month":
+        return f"{value.year:04d}-{value.month:02d}"
+    return value.date().isoformat() if isinstance(value, datetime) else value.isoformat()
+
+
+def movement_query(db, date_column, start, end, columns=()):
+    """Employees whose date_column falls in [start, end], counted per columns and stored date."""
+    return (
+        db.query(*columns, date_column, func.count())
+        .select_from(Employee)
+        .outerjoin(EmployeeProfile, _latest_profile())
+        .filter(date_column >= datetime.combine(start, time.min), date_column < datetime.combine(end + timedelta(days=1), time.min))
+        .group_by(*columns, date_column)
+    )
+
+
+def _movements(db, date_column, start, end, by, period, extra=()):
+    """movement_query grouped by the latest profile's dimensions (plus extra columns) and by period."""
+    columns = [*_profile_columns(by), *extra]
+    keys = [*(f"{name}_id" for name in by), *(column.key for column in extra)]
+    rows = movement_query(db, date_column, start, end, columns)
+    # grouped by the stored date in SQL, rolled up into periods here, so no dialect-specific date functions
+    counts = Counter()
+    for *values, moved_on, count in rows:
+        counts[(*values, _period_key(moved_on, period))] += count
+    groups = [{**dict(zip([*keys, "period"], key)), "employees": count} for key, count in counts.items()]
+    groups.sort(key=lambda group: tuple((value is None, value) for value in group.values()))
+    return {
+        "from": start, "to": end, "by": list(by), "period": period,
+        "total": sum(group["employees"] for group in groups), "groups": groups,
+    }
+
+
+def joiners(db, start, end, by=(), period="month"):
+    return _movements(db, Employee.date_of_joining, start, end, by, period)
+
+
+def attrition(db, start, end, by=(), period="month", live=False):
+    result = _movements(db, Employee.date_of_leaving, start, end, by, period, extra=(Employee.reason_of_leaving,))
+    # leavers over the current headcount plus those leavers: a rough rate for the window
+    current = headcount(db, live=live)["total"]
+    result["attrition_rate"] = round(result["total"] / (current + result["total"]), 4) if current + result["total"] else 0.0
+    return result
@@ -0,0 +1,170 @@
+import inspect
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import select
+
+from .conditional import conditional_list_async
+from .fields import fields_param, keyset_paginate_fields_async
+from .pagination import Page, page_params
+
+
+class AsyncCrudSpec:
+    """Describes one entity's routes so build_async_crud_router can mirror the sync handlers.
+
+    filters maps a list query parameter to either a column (equality) or a callable
+    returning a where-clause for the given value. unique is the sync handlers'
+    UniqueFields, so both modes report duplicates the same way. order_by is a
+    column lists sort on before id, as the sync handler does. active_only makes
+    deactivated rows 404 on the item routes, for entities whose sync handlers do.
+
+    Hooks, for the rules a sync handler applies beyond plain CRUD:
+    before_create(db, data) and before_update(db, item, data) run before the
+    write and may raise; after_write(item, previous) runs once it is committed,
+    with the changed fields' previous values (None for a create).
+    """
+
+    def __init__(self, model, read_schema, create_schema, update_schema, label, list_path, item_path,
+                 create_path=None, unique=None, filters=None, descending=False, order_by=None, active_only=False,
+                 before_create=None, before_update=None, after_write=None):
+        self.model = model
+        self.read_schema = read_schema
+        self.create_schema = create_schema
+        self.update_schema = update_schema
+        self.label = label
+        self.list_path = list_path
+        self.item_path = item_path
+        self.create_path = create_path or list_path
+        self.unique = unique
+        self.filters = filters or {}
+        self.descending = descending
+        self.order_by = order_by
+        self.active_only = active_only
+        self.before_create = before_create
+        self.before_update = before_update
+        self.after_write = after_write
+
+
+def _filter_params(names):
+    # A dependency whose signature is generated from the spec, so each filter
+    # shows up as a normal optional query parameter in OpenAPI
+    def dependency(**kwargs):
+        return kwargs
+    dependency.__signature__ = inspect.Signature([
+        inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Optional[int])
+        for name in names
+    ])
+    return dependency
+
+
+def _add_routes(router, spec, get_db, auth):
+    model = spec.model
+    not_found = f"{spec.label} not found"
+
+    async def commit(db, data, exclude_id=None):
+        if spec.unique:
+            await spec.unique.commit_async(db, data, exclude_id)
+        else:
+            await db.commit()
+
+    async def get_or_404(db, item_id):
+        if spec.active_only:
+            item = (await db.execute(select(model).where(model.id == item_id, model.is_active == True))).scalar_one_or_none()
+        else:
+            item = await db.get(model, item_id)
+        if not item:
+            raise HTTPException(status_code=404, detail=not_found)
+        return item
+
+    async def list_items(request: Request, response: Response, is_active: bool = True, filters: dict = Depends(_filter_params(spec.filters)),
+                         fields: Optional[str] = Depends(fields_param), page: dict = Depends(page_params),
+                         db=Depends(get_db), user_email=Depends(auth)):
+        stmt = select(model).where(model.is_active == is_active)
+        for name, value in filters.items():
+            if value is None:
+                continue
+            target = spec.filters[name]
+            stmt = stmt.where(target(value) if callable(target) else target == value)
+        return await conditional_list_async(
+            request, response, db, stmt, model,
+            lambda: keyset_paginate_fields_async(db, stmt, model, spec.read_schema, fields, descending=spec.descending, order_by=spec.order_by, **page),
+            page, descending=spec.descending, order_by=spec.order_by,
+        )
+
+    async def create_item(item: spec.create_schema, db=Depends(get_db), user_email=Depends(auth)):
+        data = item.model_dump()
+        if spec.unique:
+            await spec.unique.check_async(db, data)
+        if spec.before_create:
+            await spec.before_create(db, data)
+        db_item = model(**data)
+        db.add(db_item)
+        await commit(db, data)
+        await db.refresh(db_item)
+        if spec.after_write:
+            await spec.after_write(db_item, None)
+        return db_item
+
+    async def read_item(item_id: int, db=Depends(get_db), user_email=Depends(auth)):
+        return await get_or_404(db, item_id)
+
+    async def update_item(item_id: int, item: spec.update_schema, db=Depends(get_db), user_email=Depends(auth)):
+        db_item = await get_or_404(db, item_id)
+        update_data = item.model_dump(exclude_unset=True)
+        if spec.unique:
+            await spec.unique.check_async(db, update_data, exclude_id=item_id)
+        if spec.before_update:
+            await spec.before_update(db, db_item, update_data)
+        previous = {key: getattr(db_item, key) for key in update_data}
+        for key, value in update_data.items():
+            setattr(db_item, key, value)
+        await commit(db, update_data, exclude_id=item_id)
+        await db.refresh(db_item)
+        if spec.after_write:
+            await spec.after_write(db_item, previous)
+        return db_item
+
+    async def deactivate_item(item_id: int, db=Depends(get_db), user_email=Depends(auth)):
+        db_item = await get_or_404(db, item_id)
+        previous = {"is_active": db_item.is_active}
+        db_item.is_active = False
+        await db.commit()
+        if spec.after_write:
+            await spec.after_write(db_item, previous)
+
+    item_path = spec.item_path.replace("{id}", "{item_id}")
+    name = model.__tablename__
+    router.add_api_route(spec.list_path, list_items, methods=["GET"], response_model=Page[spec.read_schema], name=f"async_list_{name}")
+    router.add_api_route(spec.create_path, create_item, methods=["POST"], status_code=201, response_model=spec.read_schema, name=f"async_create_{name}")
+    router.add_api_route(item_path, read_item, methods=["GET"], response_model=spec.read_schema, name=f"async_read_{name}")
+    router.add_api_route(item_path, update_item, methods=["PATCH"], response_model=spec.read_schema, name=f"async_partial_update_{name}")
+    router.add_api_route(item_path, update_item, methods=["PUT"], response_model=spec.read_schema, name=f"async_update_{name}")
+    router.add_api_route(item_path, deactivate_item, methods=["DELETE"], status_code=204, name=f"async_deactivate_{name}")
+
+
+def build_async_crud_router(specs, get_db, auth):
+    router = APIRouter()
+    for spec in specs:
+        _add_routes(router, spec, get_db, auth)
+    return router
+
+
+def _route_keys(route):
+    # Path parameter names differ between the sync and async handlers, so compare by shape
+    path = route.path_format
+    segments = ["{}" if part.startswith("{") else part for part in path.split("/")]
+    return {("/".join(segments), method) for method in route.methods}
+
+
+def replace_routes(app, router):
+    """Swap the app's sync handlers for the router's, keeping every other route and its order."""
+    replaced = set()
+    for route in router.routes:
+        replaced |= _route_keys(route)
+    app.router.routes = [
+        route for route in app.router.routes
+        if not (isinstance(route, APIRoute) and _route_keys(route) & replaced)
+    ]
+    app.include_router(router)
+    app.openapi_schema = None
@@ -1,9 +1,18 @@
 from passlib.context import CryptContext
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import FastAPI
 from datetime import timedelta, datetime
 from jose import JWTError, jwt
 from pydantic import BaseModel
+import asyncio
+import hashlib
+import os
+import threading
+import time
+
+from .metrics import password_queue_wait
 
 secret_key = "your_secret_key"
 ALGORITHM = "HS256"
@@ -16,6 +25,82 @@ def hash_password(password=str):
 def verify_password(plain_password, hashed_password):
     return pwd.verify(plain_password, hashed_password)
 
+# bcrypt is deliberately slow, so it gets its own small pool instead of the
+# shared request threadpool; once PASSWORD_HASH_MAX_PENDING jobs are waiting
+# new ones are rejected with PasswordHasherBusy (mapped to a 503 in main).
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 8))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", 1))
+
+class PasswordHasherBusy(Exception):
+    pass
+
+password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_password_pool_lock = threading.Lock()
+_password_pool_stats = {
+    "pending": 0,
+    "completed": 0,
+    "failed": 0,
+    "cancelled": 0,
+    "rejected": 0,
+    "queue_wait_seconds_total": 0.0,
+    "run_seconds_total": 0.0,
+}
+
+def password_hash_stats():
+    with _password_pool_lock:
+        stats = dict(_password_pool_stats)
+    stats["workers"] = PASSWORD_HASH_WORKERS
+    stats["max_pending"] = PASSWORD_HASH_MAX_PENDING
+    return stats
+
+def _password_job_done(future):
+    # Runs when the pool thread is done with the job (or it was cancelled before
+    # starting), not when the awaiting request goes away: a bcrypt call already
+    # running keeps its worker busy and stays pending until it returns.
+    with _password_pool_lock:
+        _password_pool_stats["pending"] -= 1
+        if future.cancelled():
+            _password_pool_stats["cancelled"] += 1
+        elif future.exception() is not None:
+            _password_pool_stats["failed"] += 1
+        else:
+            _password_pool_stats["completed"] += 1
+
+async def _run_password_job(func, *args):
+    with _password_pool_lock:
+        if _password_pool_stats["pending"] >= PASSWORD_HASH_MAX_PENDING:
+            _password_pool_stats["rejected"] += 1
+            raise PasswordHasherBusy()
+        _password_pool_stats["pending"] += 1
+    submitted = time.perf_counter()
+
+    def job():
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            password_queue_wait.observe(started - submitted)
+            with _password_pool_lock:
+                _password_pool_stats["queue_wait_seconds_total"] += started - submitted
+                _password_pool_stats["run_seconds_total"] += finished - started
+
+    try:
+        future = password_pool.submit(job)
+    except BaseException:
+        with _password_pool_lock:
+            _password_pool_stats["pending"] -= 1
+        raise
+    future.add_done_callback(_password_job_done)
+    return await asyncio.wrap_future(future)
+
+async def hash_password_async(password):
+    return await _run_password_job(hash_password, password)
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
 def create_access_token(data=dict, expires_delta=timedelta):
     to_encode = data.copy()
     expires_delta = datetime.utcnow() + expires_delta if expires_delta else datetime.utcnow() + timedelta(minutes=15)
@@ -29,6 +114,55 @@ def  decode_access_token(token=str):
         return payload if payload.get("sub") else None
     except JWTError:
         return None
+
+# Clients resend the same bearer token on every call, so verified payloads are
+# kept in a small LRU keyed by the token's SHA-256 and dropped at the token's exp.
+# Only successfully verified tokens are cached.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
+_token_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+def token_cache_stats():
+    with _token_cache_lock:
+        stats = dict(_token_cache_stats)
+        stats["size"] = len(_token_cache)
+    stats["max_size"] = TOKEN_CACHE_SIZE
+    return stats
+
+def clear_token_cache():
+    with _token_cache_lock:
+        _token_cache.clear()
+
+def decode_access_token_cached(token=str):
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+    with _token_cache_lock:
+        entry = _token_cache.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if now < expires_at:
+                _token_cache.move_to_end(key)
+                _token_cache_stats["hits"] += 1
+                return payload
+            del _token_cache[key]
+            _token_cache_stats["evictions"] += 1
+        _token_cache_stats["misses"] += 1
+
+    payload = decode_access_token(token)
+    if payload is None or TOKEN_CACHE_SIZE <= 0:
+        return payload
+    expires_at = payload.get("exp")
+    if expires_at is None:
+        return payload
+    with _token_cache_lock:
+        _token_cache[key] = (expires_at, payload)
+        _token_cache.move_to_end(key)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+            _token_cache_stats["evictions"] += 1
+    return payload
     
     
     
\ No newline at end of file
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+
+from .pagination import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor
+
+# Lookup tables (grades, designations, branches, ...) are tiny and read on almost
+# every screen, so each one is held in memory as already-serialised dicts. Writes
+# through the API call invalidate(); the TTL bounds staleness when another worker
+# process did the write.
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", 60))
+
+
+class CachedTable:
+    def __init__(self, rows):
+        self.rows = rows
+        self.ids = [row["id"] for row in rows]
+        self.by_id = {row["id"]: row for row in rows}
+        self.loaded_at = time.monotonic()
+        digest = hashlib.sha256(json.dumps(rows, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+        # Derived from the content, so every worker hands out the same ETag for the same data
+        self.etag = f'W/"{digest[:32]}"'
+
+    def page(self, limit=DEFAULT_PAGE_SIZE, cursor=None, **filters):
+        start = bisect_right(self.ids, decode_cursor(cursor)) if cursor else 0
+        items = []
+        for row in self.rows[start:]:
+            if all(value is None or row.get(key) == value for key, value in filters.items()):
+                items.append(row)
+                if len(items) > limit:
+                    break
+        next_cursor = encode_cursor(items[limit - 1]["id"]) if len(items) > limit else None
+        return {"items": items[:limit], "next_cursor": next_cursor}
+
+
+class ReferenceCache:
+    def __init__(self, ttl=REFERENCE_CACHE_TTL):
+        self.ttl = ttl
+        self._tables = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, db, model, schema):
+        name = model.__tablename__
+        # Hits take the lock too so the counters stay exact; it is only held for
+        # long while a table (re)loads, once per TTL or write
+        with self._lock:
+            table = self._tables.get(name)
+            if table is not None and time.monotonic() - table.loaded_at < self.ttl:
+                self.stats["hits"] += 1
+                return table
+            self.stats["misses"] += 1
+            rows = [schema.model_validate(row, from_attributes=True).model_dump(mode="json") for row in db.query(model).order_by(model.id)]
+            table = CachedTable(rows)
+            self._tables[name] = table
+            return table
+
+    def invalidate(self, model):
+        # Takes the lock so a load that started before the write can't be stored after it
+        with self._lock:
+            self._tables.pop(model.__tablename__, None)
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+
+reference_cache = ReferenceCache()
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
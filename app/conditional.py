@@ -0,0 +1,79 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response
+
+from .cache import etag_matches
+from .pagination import keyset_paginate, keyset_paginate_async
+
+# Conditional GET for database-backed lists. The validators describe the page
+# being served: the same keyset query the list runs, for the rows of this window
+# only. The ETag hashes every column of those rows (what the page renders from),
+# so any write to a row in the window changes it, whatever the timestamp
+# resolution; so does a row entering or leaving the window, or the page gaining
+# or losing a next page. Nothing outside the window is read, so the check costs
+# one page whatever the size of the table.
+
+
+def _validators(request, window):
+    rows = [tuple(row) for row in window["items"]]
+    state = f"{request.url.path}?{request.url.query}|{rows!r}|{window['next_cursor']}"
+    headers = {
+        "ETag": f'W/"{hashlib.sha256(state.encode()).hexdigest()[:32]}"',
+        "Cache-Control": "private, no-cache",
+    }
+    changed = (row.updated_at or row.created_at for row in window["items"])
+    last_changed = max((value for value in changed if value is not None), default=None)
+    if last_changed is not None:
+        if last_changed.tzinfo is None:
+            # SQLite's CURRENT_TIMESTAMP is UTC but comes back naive
+            last_changed = last_changed.replace(tzinfo=timezone.utc)
+        last_changed = last_changed.astimezone(timezone.utc).replace(microsecond=0)
+        # Last-Modified has one-second resolution: only send it once that second is
+        # over, so a later write can't share it and be hidden by If-Modified-Since
+        if last_changed < datetime.now(timezone.utc).replace(microsecond=0):
+            headers["Last-Modified"] = format_datetime(last_changed, usegmt=True)
+        else:
+            last_changed = None
+    return headers, last_changed
+
+
+def _not_modified(request, headers, last_changed):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return etag_matches(if_none_match, headers["ETag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_changed is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_changed <= since
+    return False
+
+
+def _respond(result, response, headers):
+    (result if isinstance(result, Response) else response).headers.update(headers)
+    return result
+
+
+def conditional_list(request, response, query, model, render, page, descending=False, order_by=None):
+    """304 if the page of `query` described by page/descending/order_by is unchanged,
+    otherwise render() with validators attached."""
+    window = keyset_paginate(query.with_entities(*model.__table__.columns), model, descending=descending, order_by=order_by, **page)
+    headers, last_changed = _validators(request, window)
+    if _not_modified(request, headers, last_changed):
+        return Response(status_code=304, headers=headers)
+    return _respond(render(), response, headers)
+
+
+async def conditional_list_async(request, response, db, stmt, model, render, page, descending=False, order_by=None):
+    window = await keyset_paginate_async(
+        db, stmt.with_only_columns(*model.__table__.columns), model,
+        descending=descending, scalars=False, order_by=order_by, **page,
+    )
+    headers, last_changed = _validators(request, window)
+    if _not_modified(request, headers, last_changed):
+        return Response(status_code=304, headers=headers)
+    return _respond(await render(), response, headers)
@@ -1,11 +1,123 @@
-from sqlalchemy import create_engine, Integer, String, Sequence
+from sqlalchemy import create_engine, event, make_url, Integer, String, Sequence
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+import os
+import time
 
-DATABASE_URL = "sqlite:///./hrms.db"
+from .metrics import pool_checkout_wait
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./hrms.db")
+DB_PROFILE = os.getenv("DB_PROFILE", "production")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+# "sync" serves CRUD routes with Session/threadpool handlers, "async" swaps in the
+# AsyncSession handlers from app/async_crud.py
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+# PRAGMAs applied to every new SQLite connection, per profile. "compat" is the
+# old behaviour (rollback journal, no busy timeout). Any value can be overridden
+# with an environment variable, e.g. SQLITE_MMAP_SIZE=0.
+SQLITE_PROFILES = {
+    "compat": {},
+    "production": {
+        "journal_mode": "WAL",          # readers no longer block on a writer's commit
+        "synchronous": "NORMAL",        # safe with WAL, one fsync per checkpoint instead of per commit
+        "busy_timeout": 5000,           # wait up to 5s for the write lock instead of "database is locked"
+        "mmap_size": 268435456,         # 256 MiB memory-mapped reads
+        "cache_size": -65536,           # 64 MiB page cache (negative means KiB)
+        "temp_store": "MEMORY",
+    },
+}
+
+class _TimedCheckout:
+    # how long each checkout waited for a connection (including opening a new one)
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - started)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+def sqlite_pragmas(profile):
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}, expected one of {sorted(SQLITE_PROFILES)}")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PROFILES["production"]:
+        override = os.getenv(f"SQLITE_{name.upper()}")
+        if override is not None:
+            pragmas[name] = override
+    return pragmas
+
+def create_db_engine(url=DATABASE_URL, profile=DB_PROFILE):
+    if not url.startswith("sqlite"):
+        return create_engine(url, poolclass=TimedQueuePool, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_pre_ping=True)
+
+    if ":memory:" in url or url.rstrip("/") == "sqlite:":
+        # a single shared connection, otherwise every checkout sees an empty database
+        db_engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        db_engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+
+    _apply_sqlite_pragmas(db_engine, sqlite_pragmas(profile))
+    return db_engine
+
+def _apply_sqlite_pragmas(db_engine, pragmas):
+    @event.listens_for(db_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_database_url(url=DATABASE_URL):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r}")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_async_db_engine(url=None, profile=DB_PROFILE):
+    # imported here so aiosqlite/asyncpg are only needed when DB_MODE=async
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(url) if url else async_database_url()
+    if url.get_backend_name() != "sqlite":
+        return create_async_engine(url, poolclass=TimedAsyncQueuePool, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_pre_ping=True)
+    if url.database in (None, "", ":memory:"):
+        db_engine = create_async_engine(url, poolclass=StaticPool)
+    else:
+        db_engine = create_async_engine(url, poolclass=TimedAsyncQueuePool, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    _apply_sqlite_pragmas(db_engine.sync_engine, sqlite_pragmas(profile))
+    return db_engine
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker
 
+    async_engine = create_async_db_engine()
+    # expire_on_commit=False: attributes can't be lazy-loaded again once we're back in the event loop
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
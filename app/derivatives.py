@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from fastapi.responses import FileResponse
+
+from .storage import IMMUTABLE_CACHE_CONTROL, blob_path, reference_digest
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # no derivatives; the endpoints answer 404
+    Image = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # images only, no first-page previews of PDF scans
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+# Thumbnails and previews of uploaded files, written next to the original as
+# <sha256>.thumbnail.jpg / <sha256>.preview.jpg. Uploads queue a render on a
+# small pool of its own; a request for a derivative that isn't there yet (queue
+# was full, file predates this) joins the queued job or queues one, and gets a
+# 503 with Retry-After while DERIVATIVE_MAX_PENDING jobs are already waiting.
+DERIVATIVE_WORKERS = int(os.getenv("DERIVATIVE_WORKERS", 2))
+DERIVATIVE_MAX_PENDING = int(os.getenv("DERIVATIVE_MAX_PENDING", DERIVATIVE_WORKERS * 64))
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", 160))
+PREVIEW_SIZE = int(os.getenv("PREVIEW_SIZE", 1024))
+DERIVATIVE_RETRY_AFTER = int(os.getenv("DERIVATIVE_RETRY_AFTER", 2))
+JPEG_QUALITY = 80
+KINDS = ("thumbnail", "preview")
+
+derivative_pool = ThreadPoolExecutor(max_workers=DERIVATIVE_WORKERS, thread_name_prefix="derivatives")
+_jobs = {}
+_jobs_lock = threading.Lock()
+_stats = {"completed": 0, "unsupported": 0, "failed": 0, "rejected": 0}
+
+
+def derivative_stats():
+    with _jobs_lock:
+        stats = dict(_stats)
+        stats["pending"] = len(_jobs)
+    stats["workers"] = DERIVATIVE_WORKERS
+    stats["max_pending"] = DERIVATIVE_MAX_PENDING
+    return stats
+
+
+def derivative_path(digest, kind):
+    return f"{blob_path(digest)}.{kind}.jpg"
+
+
+def _open_source(path):
+    with open(path, "rb") as f:
+        magic = f.read(5)
+    if magic == b"%PDF-":
+        if pdfium is None:
+            return None
+        pdf = pdfium.PdfDocument(path)
+        try:
+            page = pdf[0]
+            # PDF sizes are in points; render the first page straight at preview size
+            return page.render(scale=PREVIEW_SIZE / max(page.get_width(), page.get_height())).to_pil()
+        finally:
+            pdf.close()
+    try:
+        image = Image.open(path)
+        # JPEG decodes at 1/2, 1/4, 1/8 scale when that still covers the preview
+        image.draft("RGB", (PREVIEW_SIZE, PREVIEW_SIZE))
+        return ImageOps.exif_transpose(image)
+    except (OSError, Image.DecompressionBombError):
+        return None
+
+
+def _flatten(image):
+    # JPEG has no alpha: transparent PNGs go onto white rather than black
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _save(image, path):
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    image.save(tmp, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    os.replace(tmp, path)
+
+
+def render_derivatives(digest):
+    """Write the thumbnail and preview of a stored file; False when it isn't a readable image (or PDF)."""
+    if all(os.path.exists(derivative_path(digest, kind)) for kind in KINDS):
+        return True
+    if Image is None:
+        return False
+    image = _open_source(blob_path(digest))
+    if image is None:
+        return False
+    preview = _flatten(image)
+    preview.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE))
+    _save(preview, derivative_path(digest, "preview"))
+    # fixed size: cropped to a square so list rows line up
+    _save(ImageOps.fit(preview, (THUMBNAIL_SIZE, THUMBNAIL_SIZE)), derivative_path(digest, "thumbnail"))
+    return True
+
+
+def _job(digest):
+    try:
+        rendered = render_derivatives(digest)
+        outcome = "completed" if rendered else "unsupported"
+        return rendered
+    except Exception:
+        logger.exception("Rendering derivatives of %s failed", digest)
+        outcome = "failed"
+        return False
+    finally:
+        with _jobs_lock:
+            _jobs.pop(digest, None)
+            _stats[outcome] += 1
+
+
+def schedule_derivatives(digest):
+    """Queue a render of digest's derivatives. Concurrent calls share one job; returns
+    its Future, or None when DERIVATIVE_MAX_PENDING jobs are waiting."""
+    with _jobs_lock:
+        future = _jobs.get(digest)
+        if future is None:
+            if len(_jobs) >= DERIVATIVE_MAX_PENDING:
+                _stats["rejected"] += 1
+                return None
+            future = _jobs[digest] = derivative_pool.submit(_job, digest)
+    return future
+
+
+async def derivative_response(name, kind):
+    digest = reference_digest(name)
+    if digest is None or not os.path.isfile(blob_path(digest)):
+        raise HTTPException(status_code=404, detail="File not found")
+    path = derivative_path(digest, kind)
+    if not os.path.exists(path):
+        future = schedule_derivatives(digest)
+        if future is None:
+            raise HTTPException(
+                status_code=503,
+                detail=f"The {kind} is not rendered yet, please retry shortly",
+                headers={"Retry-After": str(DERIVATIVE_RETRY_AFTER)},
+            )
+        if not await asyncio.wrap_future(future):
+            raise HTTPException(status_code=404, detail=f"No {kind} available for this file")
+    return FileResponse(path, media_type="image/jpeg", headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, case, delete, func, insert, select, tuple_
+
+from .models import Document, DocumentExpiryBucket
+from .pagination import decode_cursor_values, encode_cursor_values
+
+logger = logging.getLogger(__name__)
+
+# The sweep rebuilds document_expiry_buckets from the (is_active, expiry_date)
+# index: one range read of the documents expiring within the last bucket, so
+# compliance dashboards read a handful of precomputed rows. 0 disables it.
+DOCUMENT_EXPIRY_SWEEP_SECONDS = int(os.getenv("DOCUMENT_EXPIRY_SWEEP_SECONDS", 3600))
+
+# (name, last day from today); "expired" is everything before today
+EXPIRY_BUCKETS = (("0-7", 7), ("8-30", 30), ("31-60", 60), ("61-90", 90))
+
+
+def day_start(day):
+    # expiry_date is a DateTime column holding midnight, so ranges are compared as datetimes
+    return datetime.combine(day, time.min)
+
+
+def expiring_documents(query, within_days, today=None, limit=50, cursor=None):
+    """Active documents expiring between today and today + within_days, soonest first.
+
+    Keyset on (expiry_date, id), which is the index order, so pages never sort.
+    """
+    today = today or date.today()
+    query = query.filter(
+        Document.is_active == True,
+        Document.expiry_date >= day_start(today),
+        Document.expiry_date < day_start(today + timedelta(days=within_days + 1)),
+    )
+    if cursor:
+        values = decode_cursor_values(cursor)
+        try:
+            last = (datetime.fromisoformat(values["expiry_date"]), int(values["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(Document.expiry_date, Document.id) > last)
+    rows = query.order_by(Document.expiry_date, Document.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last_row = rows[limit - 1]
+        next_cursor = encode_cursor_values({"expiry_date": last_row.expiry_date.isoformat(), "id": last_row.id})
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+
+def expiry_counts(today):
+    bucket = case(
+        (Document.expiry_date < day_start(today), "expired"),
+        *((Document.expiry_date < day_start(today + timedelta(days=last + 1)), name) for name, last in EXPIRY_BUCKETS),
+    ).label("bucket")
+    horizon = day_start(today + timedelta(days=EXPIRY_BUCKETS[-1][1] + 1))
+    return (
+        select(Document.document_type_id, bucket, func.count().label("documents"))
+        .where(and_(Document.is_active == True, Document.expiry_date < horizon))
+        .group_by(Document.document_type_id, bucket)
+    )
+
+
+def sweep_document_expiry(engine, today=None):
+    """Recount active documents per type and expiry bucket, replacing the previous summary."""
+    today = today or date.today()
+    with engine.begin() as connection:
+        rows = [
+            {"document_type_id": document_type_id, "bucket": name, "documents": documents, "as_of": today}
+            for document_type_id, name, documents in connection.execute(expiry_counts(today))
+        ]
+        connection.execute(delete(DocumentExpiryBucket))
+        if rows:
+            connection.execute(insert(DocumentExpiryBucket), rows)
+    return len(rows)
+
+
+async def run_expiry_sweeps(engine, interval=DOCUMENT_EXPIRY_SWEEP_SECONDS):
+    # Runs for the life of the process (started from the app lifespan); every worker
+    # sweeps, which is harmless since each sweep replaces the summary in one transaction.
+    while True:
+        try:
+            started = asyncio.get_running_loop().time()
+            buckets = await run_in_threadpool(sweep_document_expiry, engine)
+            logger.info("Document expiry sweep: %d buckets in %.3fs", buckets, asyncio.get_running_loop().time() - started)
+        except Exception:
+            logger.exception("Document expiry sweep failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,81 @@
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import HTTPException, Query
+from fastapi.responses import JSONResponse
+from pydantic import create_model
+
+from .pagination import keyset_paginate, keyset_paginate_async
+from .serialization import FAST_JSON, fast_page
+
+# ?fields=id,name,employee_code selects only those columns in SQL and serialises
+# them with a slim model derived from the endpoint's read schema. id is always
+# included because the keyset cursor is built from it.
+
+
+def fields_param(fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,employee_code")):
+    return fields
+
+
+def parse_fields(fields, schema):
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+@lru_cache(maxsize=256)
+def slim_model(schema, names):
+    definitions = {}
+    for name in names:
+        field = schema.model_fields[name]
+        definitions[name] = (field.annotation, ... if field.is_required() else field.default)
+    return create_model(f"{schema.__name__}Fields", **definitions)
+
+
+def sparse_page(page, schema, names):
+    # Returned as a JSONResponse so FastAPI doesn't validate it against the full response_model
+    slim = slim_model(schema, names)
+    items = [slim.model_validate(row, from_attributes=True).model_dump(mode="json") for row in page["items"]]
+    return JSONResponse(content={"items": items, "next_cursor": page["next_cursor"]})
+
+
+def sparse_items(page, names):
+    # for already-serialised rows (reference_cache)
+    return {"items": [{name: row[name] for name in names} for row in page["items"]], "next_cursor": page["next_cursor"]}
+
+
+def _render(page, schema, names):
+    return fast_page(page, schema, names) if FAST_JSON else sparse_page(page, schema, names)
+
+
+def _columns(model, names, order_by):
+    # the sort column goes last when not requested: rows are rendered by position, so it's ignored there
+    columns = [getattr(model, name) for name in names]
+    if order_by is not None and order_by.key not in names:
+        columns.append(order_by)
+    return columns
+
+
+def keyset_paginate_fields(query, model, schema, fields, descending=False, order_by=None, **page):
+    names = parse_fields(fields, schema)
+    if names is None:
+        if not FAST_JSON:
+            return keyset_paginate(query, model, descending=descending, order_by=order_by, **page)
+        names = tuple(schema.model_fields)
+    query = query.with_entities(*_columns(model, names, order_by))
+    return _render(keyset_paginate(query, model, descending=descending, order_by=order_by, **page), schema, names)
+
+
+async def keyset_paginate_fields_async(db, stmt, model, schema, fields, descending=False, order_by=None, **page):
+    names = parse_fields(fields, schema)
+    if names is None:
+        if not FAST_JSON:
+            return await keyset_paginate_async(db, stmt, model, descending=descending, order_by=order_by, **page)
+        names = tuple(schema.model_fields)
+    stmt = stmt.with_only_columns(*_columns(model, names, order_by))
+    return _render(await keyset_paginate_async(db, stmt, model, descending=descending, scalars=False, order_by=order_by, **page), schema, names)
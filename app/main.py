@@ -1,15 +1,68 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request,UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Response, UploadFile, File, Query
+from fastapi.exceptions import RequestValidationError
 from datetime import date, datetime,timedelta
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from pydantic import BaseModel, Field, ValidationError
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from .models import User, Company, Branch, Department, Project, Employee, Designation, EmployeeType, Grade,DocumentType, Employee, EmployeeProfile, BankDetail, Document, WorkExperience, Education
-from .database import SessionLocal, engine, Base
-from .auth import hash_password, verify_password, create_access_token, decode_access_token
-from typing import Optional
-
-Base.metadata.create_all(bind=engine)
-app = FastAPI()
+from .models import User, Company, Branch, Department, Project, Employee, Designation, EmployeeType, Grade,DocumentType, Employee, EmployeeProfile, BankDetail, Document, DocumentExpiryBucket, WorkExperience, Education
+from .database import SessionLocal, AsyncSessionLocal, engine, async_engine, DB_MODE
+from .auth import hash_password_async, verify_password_async, create_access_token, decode_access_token_cached, PasswordHasherBusy, PASSWORD_HASH_RETRY_AFTER, password_hash_stats, token_cache_stats
+from .pagination import Page, page_params, keyset_paginate, encode_cursor_values, decode_cursor_values
+from .cache import reference_cache, etag_matches
+from .async_crud import AsyncCrudSpec, build_async_crud_router, replace_routes
+from .schema import ensure_schema
+from .search import search_employee_ids
+from .fields import fields_param, parse_fields, sparse_items, keyset_paginate_fields
+from .conditional import conditional_list
+from .compression import CompressionMiddleware
+from .querystats import DB_QUERY_STATS, QueryStatsMiddleware, instrument_engine
+from .metrics import MetricsMiddleware, render as render_metrics
+from .orgchart import org_chart, ReportingCycle
+from .uniqueness import UniqueFields
+from .storage import receive_upload, file_response, upload_request_body
+from .expiry import DOCUMENT_EXPIRY_SWEEP_SECONDS, expiring_documents, run_expiry_sweeps
+from .derivatives import KINDS as DERIVATIVE_KINDS, derivative_response, derivative_stats, schedule_derivatives
+from .analytics import DIMENSIONS, PERIODS, HeadcountChange, rebuild_headcount, headcount, joiners, attrition
+from .payroll import load_payroll
+from contextlib import asynccontextmanager
+from typing import Annotated, Literal, Optional
+import asyncio
+import csv
+import io
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+_import_started = time.perf_counter()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema is checked once per process here instead of create_all() at import time
+    schema = await run_in_threadpool(ensure_schema, engine)
+    await run_in_threadpool(rebuild_headcount, engine)
+    app.state.startup = {
+        "schema": schema,
+        "startup_seconds": round(time.perf_counter() - _import_started, 4),
+    }
+    logger.info("Startup finished in %.3fs (schema %s in %.3fs)", app.state.startup["startup_seconds"], schema["status"], schema["seconds"])
+    expiry_sweeps = asyncio.create_task(run_expiry_sweeps(engine)) if DOCUMENT_EXPIRY_SWEEP_SECONDS > 0 else None
+    yield
+    if expiry_sweeps is not None:
+        expiry_sweeps.cancel()
+    engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)
+if DB_QUERY_STATS:
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine)
+    app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
 security = HTTPBearer()
 
 def get_db():
@@ -19,6 +72,16 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def cached_response(request: Request, etag: str, content):
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
 # def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
 #     token = credentials.credentials
 #     payload = decode_access_token(token)
@@ -31,16 +94,33 @@ class UserCreate(BaseModel):
     email: str
     password: str
 
+def _get_user_by_email(db, email):
+    return db.query(User).filter(User.email == email).first()
+
+def _save_user(db, user):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+@app.exception_handler(PasswordHasherBusy)
+def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many password requests, please retry shortly"},
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+    )
+
+# register/login are async so that waiting on bcrypt doesn't hold a threadpool
+# worker; the (quick) DB calls are pushed to the threadpool explicitly.
 @app.post("/register", status_code=201)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_get_user_by_email, db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_pwd = hash_password(user.password)
+    hashed_pwd = await hash_password_async(user.password)
     new_user = User(name=user.name, email=user.email, hashed_password=hashed_pwd)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    new_user = await run_in_threadpool(_save_user, db, new_user)
     return {"id": new_user.id, "name": new_user.name, "email": new_user.email}
 
 class UserLogin(BaseModel):
@@ -48,9 +128,9 @@ class UserLogin(BaseModel):
     password: str
 
 @app.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+async def login(user: UserLogin, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_get_user_by_email, db, user.email)
+    if not db_user or not await verify_password_async(user.password, db_user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     access_token = create_access_token(data={"sub": db_user.email}, expires_delta=timedelta(minutes=30))
     return {"access_token": access_token, "token_type": "bearer","user":db_user}
@@ -77,11 +157,65 @@ def protected_route(credentials: HTTPAuthorizationCredentials = Depends(security
     if not credentials:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authenticated")
     token = credentials.credentials
-    payload = decode_access_token(token)
+    payload = decode_access_token_cached(token)
     if not payload:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token or expired token")
     return {"message": "This is a protected route", "user": payload.get("sub")}
 
+async def protected_route_async(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    # Same check, but without the threadpool hop a sync dependency costs on async routes
+    return protected_route(credentials)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    # Prometheus text format; unauthenticated so a scraper can reach it
+    tokens = token_cache_stats()
+    lookups = tokens["hits"] + tokens["misses"]
+    hasher = password_hash_stats()
+    derivatives = derivative_stats()
+    extra = [
+        ("token_cache_hits_total", "counter", "Bearer tokens served from the verified-token cache", tokens["hits"]),
+        ("token_cache_misses_total", "counter", "Bearer tokens that had to be verified", tokens["misses"]),
+        ("token_cache_hit_ratio", "gauge", "Token cache hits / lookups", tokens["hits"] / lookups if lookups else 0.0),
+        ("password_hash_pending", "gauge", "bcrypt jobs queued or running", hasher["pending"]),
+        ("password_hash_rejected_total", "counter", "bcrypt jobs rejected with 503", hasher["rejected"]),
+        ("password_hash_completed_total", "counter", "bcrypt jobs that returned", hasher["completed"]),
+        ("password_hash_failed_total", "counter", "bcrypt jobs that raised", hasher["failed"]),
+        ("file_derivative_jobs_pending", "gauge", "Thumbnail/preview renders queued or running", derivatives["pending"]),
+        ("file_derivative_jobs_rejected_total", "counter", "Renders not queued because the queue was full", derivatives["rejected"]),
+    ]
+    # db_pool_* is the sync engine (auth, threadpool handlers); with DB_MODE=async the
+    # CRUD routes check out from the async engine's pool, exported as db_async_pool_*.
+    # StaticPool (in-memory SQLite) has no size accounting
+    pools = [("db_pool", engine.pool)]
+    if async_engine is not None:
+        pools.append(("db_async_pool", async_engine.pool))
+    for prefix, pool in pools:
+        if hasattr(pool, "checkedout"):
+            extra += [
+                (f"{prefix}_size", "gauge", "Configured pool size", pool.size()),
+                (f"{prefix}_checked_out", "gauge", "Connections currently checked out", pool.checkedout()),
+                (f"{prefix}_checked_in", "gauge", "Idle connections in the pool", pool.checkedin()),
+                (f"{prefix}_overflow", "gauge", "Connections opened beyond pool_size", max(pool.overflow(), 0)),
+            ]
+    return PlainTextResponse(render_metrics(extra), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/password-hasher")
+def read_password_hasher_metrics(user_email: str = Depends(protected_route)):
+    return password_hash_stats()
+
+@app.get("/metrics/token-cache")
+def read_token_cache_metrics(user_email: str = Depends(protected_route)):
+    return token_cache_stats()
+
+@app.get("/metrics/reference-cache")
+def read_reference_cache_metrics(user_email: str = Depends(protected_route)):
+    return reference_cache.stats
+
+@app.get("/metrics/startup")
+def read_startup_metrics(request: Request, user_email: str = Depends(protected_route)):
+    return getattr(request.app.state, "startup", None)
+
 ############################################### Company CRUD Operations #####################################################
 class CompanyBase(BaseModel):
     name: str
@@ -123,10 +257,10 @@ class CompanyUpdate(BaseModel):
 
 # Routes
 
-@app.get("/companies", response_model=list[CompanyRead])
-def read_companies(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    companies = db.query(Company).filter(Company.is_active == True).all()
-    return companies
+@app.get("/companies", response_model=Page[CompanyRead])
+def read_companies(request: Request, response: Response, is_active: bool = True, fields: Optional[str] = Depends(fields_param), page: dict = Depends(page_params), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    companies = db.query(Company).filter(Company.is_active == is_active)
+    return conditional_list(request, response, companies, Company, lambda: keyset_paginate_fields(companies, Company, CompanyRead, fields, **page), page)
 
 @app.post("/companies", status_code=201, response_model=CompanyRead)
 def create_company(company: CompanyCreate, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
@@ -229,29 +363,34 @@ class updateBranch(BaseModel):
     class Config:
         orm_mode = True
 
-@app.get("/branches", response_model=list[readBranch])
-def read_branches(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    branches = db.query(Branch).filter(Branch.is_active == True).all()
-    return branches
+@app.get("/branches", response_model=Page[readBranch])
+def read_branches(request: Request, company_id: Optional[int] = None, is_active: bool = True, fields: Optional[str] = Depends(fields_param), page: dict = Depends(page_params), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    # served from memory, so the projection is applied to the cached rows
+    names = parse_fields(fields, readBranch)
+    branches = reference_cache.get(db, Branch, readBranch)
+    content = branches.page(company_id=company_id, is_active=is_active, **page)
+    return cached_response(request, branches.etag, sparse_items(content, names) if names else content)
+
+BRANCH_UNIQUE = UniqueFields(Branch, "Branch")
 
 @app.post("/branches", status_code=201, response_model=readBranch)
 def create_branch(branch: createBranch, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    existing_branch_name = db.query(Branch).filter(Branch.name == branch.name).first()
-    existing_branch_short_name = db.query(Branch).filter(Branch.short_name == branch.short_name).first()
-    if existing_branch_name or existing_branch_short_name:
-        raise HTTPException(status_code=400, detail="Branch with this name or short name already exists")
-    db_branch = Branch(**branch.dict())
+    data = branch.dict()
+    BRANCH_UNIQUE.check(db, data, message="Branch with this name or short name already exists")
+    db_branch = Branch(**data)
     db.add(db_branch)
-    db.commit()
+    BRANCH_UNIQUE.commit(db, data, message="Branch with this name or short name already exists")
+    reference_cache.invalidate(Branch)
     db.refresh(db_branch)
     return db_branch
 
 @app.get("/branches/{branch_id}", response_model=readBranch)
-def read_branch(branch_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    db_branch = db.query(Branch).filter(Branch.id == branch_id).first()
+def read_branch(branch_id: int, request: Request, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    branches = reference_cache.get(db, Branch, readBranch)
+    db_branch = branches.by_id.get(branch_id)
     if not db_branch:
         raise HTTPException(status_code=404, detail="Branch not found")
-    return db_branch
+    return cached_response(request, branches.etag, db_branch)
 
 @app.patch("/branches/{branch_id}", response_model=readBranch)
 def partial_update_branch(branch_id: int, branch: updateBranch, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
@@ -262,19 +401,13 @@ def partial_update_branch(branch_id: int, branch: updateBranch, db: Session = De
     update_data = branch.dict(exclude_unset=True)
 
     # Check for duplicate name or short_name (excluding current branch)
-    if "name" in update_data:
-        existing_branch_name = db.query(Branch).filter(Branch.name == update_data["name"], Branch.id != branch_id).first()
-        if existing_branch_name:
-            raise HTTPException(status_code=400, detail="Branch with this name already exists")
-    if "short_name" in update_data:
-        existing_branch_short_name = db.query(Branch).filter(Branch.short_name == update_data["short_name"], Branch.id != branch_id).first()
-        if existing_branch_short_name:
-            raise HTTPException(status_code=400, detail="Branch with this short name already exists")
+    BRANCH_UNIQUE.check(db, update_data, exclude_id=branch_id)
 
     for key, value in update_data.items():
         setattr(db_branch, key, value)
 
-    db.commit()
+    BRANCH_UNIQUE.commit(db, update_data, exclude_id=branch_id)
+    reference_cache.invalidate(Branch)
     db.refresh(db_branch)
     return db_branch
 
@@ -287,19 +420,13 @@ def update_branch(branch_id: int, branch: updateBranch, db: Session = Depends(ge
     update_data = branch.dict(exclude_unset=True)
 
     # Check for duplicate name or short_name (excluding current branch)
-    if "name" in update_data:
-        existing_branch_name = db.query(Branch).filter(Branch.name == update_data["name"], Branch.id != branch_id).first()
-        if existing_branch_name:
-            raise HTTPException(status_code=400, detail="Branch with this name already exists")
-    if "short_name" in update_data:
-        existing_branch_short_name = db.query(Branch).filter(Branch.short_name == update_data["short_name"], Branch.id != branch_id).first()
-        if existing_branch_short_name:
-            raise HTTPException(status_code=400, detail="Branch with this short name already exists")
+    BRANCH_UNIQUE.check(db, update_data, exclude_id=branch_id)
 
     for key, value in update_data.items():
         setattr(db_branch, key, value)
 
-    db.commit()
+    BRANCH_UNIQUE.commit(db, update_data, exclude_id=branch_id)
+    reference_cache.invalidate(Branch)
     db.refresh(db_branch)
     return db_branch
 # Use DELETE to deactivate (soft delete)
@@ -311,6 +438,7 @@ def deactivate_branch(branch_id: int, db: Session = Depends(get_db), user_email:
 
     db_branch.is_active = False
     db.commit()
+    reference_cache.invalidate(Branch)
     return "Deactivated Successfully"
 ############################################### Department CRUD Operations #####################################################
 
@@ -341,29 +469,32 @@ class updateDepartment(BaseModel):
     class Config:
         orm_mode = True
 
-@app.get("/departments", response_model=list[readDepartment])
-def read_departments(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    departments = db.query(Department).filter(Department.is_active == True).all()
-    return departments
+@app.get("/departments", response_model=Page[readDepartment])
+def read_departments(request: Request, branch_id: Optional[int] = None, is_active: bool = True, page: dict = Depends(page_params), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    departments = reference_cache.get(db, Department, readDepartment)
+    return cached_response(request, departments.etag, departments.page(branch_id=branch_id, is_active=is_active, **page))
+
+# name is only unique by convention, short_name by constraint
+DEPARTMENT_UNIQUE = UniqueFields(Department, "Department", ("name", "short_name"))
 
 @app.post("/departments", status_code=201, response_model=readDepartment)
 def create_department(department: createDepartment, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    existing_department_name = db.query(Department).filter(Department.branch_id == department.branch_id, Department.name == department.name).first()
-    existing_department_short_name = db.query(Department).filter(Department.branch_id == department.branch_id, Department.short_name == department.short_name).first()
-    if existing_department_name or existing_department_short_name:
-        raise HTTPException(status_code=400, detail="Department with this name or short name already exists")
-    db_department = Department(**department.dict())
+    data = department.dict()
+    DEPARTMENT_UNIQUE.check(db, data, where=(Department.branch_id == department.branch_id,), message="Department with this name or short name already exists")
+    db_department = Department(**data)
     db.add(db_department)
-    db.commit()
+    DEPARTMENT_UNIQUE.commit(db, data, message="Department with this name or short name already exists")
+    reference_cache.invalidate(Department)
     db.refresh(db_department)
     return db_department
 
 @app.get("/departments/{department_id}", response_model=readDepartment)
-def read_department(department_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    db_department = db.query(Department).filter(Department.id == department_id).first()
+def read_department(department_id: int, request: Request, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    departments = reference_cache.get(db, Department, readDepartment)
+    db_department = departments.by_id.get(department_id)
     if not db_department:
         raise HTTPException(status_code=404, detail="Department not found")
-    return db_department
+    return cached_response(request, departments.etag, db_department)
 
 
 @app.patch("/departments/{department_id}", response_model=readDepartment)
@@ -375,19 +506,13 @@ def partial_update_department(department_id: int, department: updateDepartment,
     update_data = department.dict(exclude_unset=True)
 
     # Check for duplicate name or short_name (excluding current department)
-    if "name" in update_data:
-        existing_department_name = db.query(Department).filter(Department.name == update_data["name"], Department.id != department_id).first()
-        if existing_department_name:
-            raise HTTPException(status_code=400, detail="Department with this name already exists")
-    if "short_name" in update_data:
-        existing_department_short_name = db.query(Department).filter(Department.short_name == update_data["short_name"], Department.id != department_id).first()
-        if existing_department_short_name:
-            raise HTTPException(status_code=400, detail="Department with this short name already exists")
+    DEPARTMENT_UNIQUE.check(db, update_data, exclude_id=department_id)
 
     for key, value in update_data.items():
         setattr(db_department, key, value)
 
-    db.commit()
+    DEPARTMENT_UNIQUE.commit(db, update_data, exclude_id=department_id)
+    reference_cache.invalidate(Department)
     db.refresh(db_department)
     return db_department
 
@@ -400,19 +525,13 @@ def update_department(department_id: int, department: updateDepartment, db: Sess
     update_data = department.dict(exclude_unset=True)
 
     # Check for duplicate name or short_name (excluding current department)
-    if "name" in update_data:
-        existing_department_name = db.query(Department).filter(Department.name == update_data["name"], Department.id != department_id).first()
-        if existing_department_name:
-            raise HTTPException(status_code=400, detail="Department with this name already exists")
-    if "short_name" in update_data:
-        existing_department_short_name = db.query(Department).filter(Department.short_name == update_data["short_name"], Department.id != department_id).first()
-        if existing_department_short_name:
-            raise HTTPException(status_code=400, detail="Department with this short name already exists")
+    DEPARTMENT_UNIQUE.check(db, update_data, exclude_id=department_id)
 
     for key, value in update_data.items():
         setattr(db_department, key, value)
 
-    db.commit()
+    DEPARTMENT_UNIQUE.commit(db, update_data, exclude_id=department_id)
+    reference_cache.invalidate(Department)
     db.refresh(db_department)
     return db_department
 
@@ -425,6 +544,7 @@ def deactivate_department(department_id: int, db: Session = Depends(get_db), use
 
     db_department.is_active = False
     db.commit()
+    reference_cache.invalidate(Department)
     return "Deactivated Successfully"
 
 ############################################### Project CRUD Operations #####################################################
@@ -483,21 +603,21 @@ class updateProject(BaseModel):
     class Config:
         orm_mode = True
 
-@app.get("/projects", response_model=list[readProject])
-def read_projects(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    projects = db.query(Project).filter(Project.is_active == True).all()
-    return projects
+@app.get("/projects", response_model=Page[readProject])
+def read_projects(request: Request, response: Response, is_active: bool = True, fields: Optional[str] = Depends(fields_param), page: dict = Depends(page_params), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    projects = db.query(Project).filter(Project.is_active == is_active)
+    return conditional_list(request, response, projects, Project, lambda: keyset_paginate_fields(projects, Project, readProject, fields, **page), page)
+
+# no unique constraints on projects, so this check is the only guard
+PROJECT_UNIQUE = UniqueFields(Project, "Project", ("name", "short_name"))
 
 @app.post("/projects", status_code=201, response_model=readProject)
 def create_project(project: createProject, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    existing_project_name = db.query(Project).filter(Project.name == project.name).first()
-    existing_project_short_name = db.query(Project).filter(Project.short_name == project.short_name).first()
-    
-    if existing_project_name or existing_project_short_name:
-        raise HTTPException(status_code=400, detail="Project with this name or short name already exists")
-    db_project = Project(**project.dict())
+    data = project.dict()
+    PROJECT_UNIQUE.check(db, data, message="Project with this name or short name already exists")
+    db_project = Project(**data)
     db.add(db_project)
-    db.commit()
+    PROJECT_UNIQUE.commit(db, data, message="Project with this name or short name already exists")
     db.refresh(db_project)
     return db_project
 
@@ -517,19 +637,12 @@ def partial_update_project(project_id: int, project: updateProject, db: Session
     update_data = project.dict(exclude_unset=True)
 
     # Check for duplicate name or short_name (excluding current project)
-    if "name" in update_data:
-        existing_project_name = db.query(Project).filter(Project.name == update_data["name"], Project.id != project_id).first()
-        if existing_project_name:
-            raise HTTPException(status_code=400, detail="Project with this name already exists")
-    if "short_name" in update_data:
-        existing_project_short_name = db.query(Project).filter(Project.short_name == update_data["short_name"], Project.id != project_id).first()
-        if existing_project_short_name:
-            raise HTTPException(status_code=400, detail="Project with this short name already exists")
+    PROJECT_UNIQUE.check(db, update_data, exclude_id=project_id)
 
     for key, value in update_data.items():
         setattr(db_project, key, value)
 
-    db.commit()
+    PROJECT_UNIQUE.commit(db, update_data, exclude_id=project_id)
     db.refresh(db_project)
     return db_project
 
@@ -542,19 +655,12 @@ def update_project(project_id: int, project: updateProject, db: Session = Depend
     update_data = project.dict(exclude_unset=True)
 
     # Check for duplicate name or short_name (excluding current project)
-    if "name" in update_data:
-        existing_project_name = db.query(Project).filter(Project.name == update_data["name"], Project.id != project_id).first()
-        if existing_project_name:
-            raise HTTPException(status_code=400, detail="Project with this name already exists")
-    if "short_name" in update_data:
-        existing_project_short_name = db.query(Project).filter(Project.short_name == update_data["short_name"], Project.id != project_id).first()
-        if existing_project_short_name:
-            raise HTTPException(status_code=400, detail="Project with this short name already exists")
+    PROJECT_UNIQUE.check(db, update_data, exclude_id=project_id)
 
     for key, value in update_data.items():
         setattr(db_project, key, value)
 
-    db.commit()
+    PROJECT_UNIQUE.commit(db, update_data, exclude_id=project_id)
     db.refresh(db_project)
     return db_project
 
@@ -569,6 +675,88 @@ def deactivate_project(project_id: int, db: Session = Depends(get_db), user_emai
     db.commit()
     return "Deactivated Successfully"
 
+############################################### Designation CRUD Operations #####################################################
+class readDesignation(BaseModel):
+    id: int
+    name: str
+    description: str
+    is_active: bool
+
+    class Config:
+        orm_mode = True
+class createDesignation(BaseModel):
+    name : str
+    description : str
+    is_active : bool
+
+class updateDesignation(BaseModel):
+    name : Optional[str] = None
+    description : Optional[str] = None
+    is_active : Optional[bool] = None
+
+    class Config:
+        orm_mode = True
+
+@app.get("/designations", response_model=Page[readDesignation])
+def read_designations(request: Request, is_active: bool = True, page: dict = Depends(page_params), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    designations = reference_cache.get(db, Designation, readDesignation)
+    return cached_response(request, designations.etag, designations.page(is_active=is_active, **page))
+
+DESIGNATION_UNIQUE = UniqueFields(Designation, "Designation")
+
+@app.post("/designations", status_code=201, response_model=readDesignation)
+def create_designation(designation: createDesignation, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    data = designation.dict()
+    DESIGNATION_UNIQUE.check(db, data)
+    db_designation = Designation(**data)
+    db.add(db_designation)
+    DESIGNATION_UNIQUE.commit(db, data)
+    reference_cache.invalidate(Designation)
+    db.refresh(db_designation)
+    return db_designation
+
+@app.get("/designations/{designation_id}", response_model=readDesignation)
+def read_designation(designation_id: int, request: Request, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    designations = reference_cache.get(db, Designation, readDesignation)
+    db_designation = designations.by_id.get(designation_id)
+    if not db_designation:
+        raise HTTPException(status_code=404, detail="Designation not found")
+    return cached_response(request, designations.etag, db_designation)
+
+@app.patch("/designations/{designation_id}", response_model=readDesignation)
+def partial_update_designation(designation_id: int, designation: updateDesignation, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    db_designation = db.query(Designation).filter(Designation.id == designation_id).first()
+    if not db_designation:
+        raise HTTPException(status_code=404, detail="Designation not found")
+
+    update_data = designation.dict(exclude_unset=True)
+
+    # Check for duplicate name (excluding current designation)
+    DESIGNATION_UNIQUE.check(db, update_data, exclude_id=designation_id)
+
+    for key, value in update_data.items():
+        setattr(db_designation, key, value)
+
+    DESIGNATION_UNIQUE.commit(db, update_data, exclude_id=designation_id)
+    reference_cache.invalidate(Designation)
+    db.refresh(db_designation)
+    return db_designation
+
+@app.put("/designations/{designation_id}", response_model=readDesignation)
+def update_designation(designation_id: int, designation: updateDesignation, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    return partial_update_designation(designation_id, designation, db, user_email)
+
+# Use DELETE to deactivate (soft delete)
+@app.delete("/designations/{designation_id}", status_code=204)
+def deactivate_designation(designation_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    db_designation = db.query(Designation).filter(Designation.id == designation_id).first()
+    if not db_designation:
+        raise HTTPException(status_code=404, detail="Designation not found")
+    db_designation.is_active = False
+    db.commit()
+    reference_cache.invalidate(Designation)
+    return {"detail": "Designation deactivated"}
+
 ######################################## Employee of CRUD Operations #####################################################
 class readEmployeeType(BaseModel):
     id: int
@@ -590,28 +778,31 @@ class updateEmployeeType(BaseModel):
 
     class Config:
         orm_mode = True
-@app.get("/employee_types", response_model=list[readEmployeeType])
-def read_employee_types(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    employee_types = db.query(EmployeeType).filter(EmployeeType.is_active == True).all()
-    return employee_types
+@app.get("/employee_types", response_model=Page[readEmployeeType])
+def read_employee_types(request: Request, is_active: bool = True, page: dict = Depends(page_params), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    employee_types = reference_cache.get(db, EmployeeType, readEmployeeType)
+    return cached_response(request, employee_types.etag, employee_types.page(is_active=is_active, **page))
+
+EMPLOYEE_TYPE_UNIQUE = UniqueFields(EmployeeType, "Employee Type")
 
 @app.post("/employee_types", status_code=201, response_model=readEmployeeType)
 def create_employee_type(employee_type: createEmployeeType, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    existing_employee_type = db.query(EmployeeType).filter(EmployeeType.name == employee_type.name).first()
-    if existing_employee_type:
-        raise HTTPException(status_code=400, detail="Employee Type with this name already exists")
-    db_employee_type = EmployeeType(**employee_type.dict())
+    data = employee_type.dict()
+    EMPLOYEE_TYPE_UNIQUE.check(db, data)
+    db_employee_type = EmployeeType(**data)
     db.add(db_employee_type)
-    db.commit()
+    EMPLOYEE_TYPE_UNIQUE.commit(db, data)
+    reference_cache.invalidate(EmployeeType)
     db.refresh(db_employee_type)
     return db_employee_type
 
 @app.get("/employee_types/{employee_type_id}", response_model=readEmployeeType)
-def read_employee_type(employee_type_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    db_employee_type = db.query(EmployeeType).filter(EmployeeType.id == employee_type_id).first()
+def read_employee_type(employee_type_id: int, request: Request, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    employee_types = reference_cache.get(db, EmployeeType, readEmployeeType)
+    db_employee_type = employee_types.by_id.get(employee_type_id)
     if not db_employee_type:
         raise HTTPException(status_code=404, detail="Employee Type not found")
-    return db_employee_type
+    return cached_response(request, employee_types.etag, db_employee_type)
 
 @app.patch("/employee_types/{employee_type_id}", response_model=readEmployeeType)
 def partial_update_employee_type(employee_type_id: int, employee_type: updateEmployeeType, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
@@ -622,15 +813,13 @@ def partial_update_employee_type(employee_type_id: int, employee_type: updateEmp
     update_data = employee_type.dict(exclude_unset=True)
 
     # Check for duplicate name (excluding current employee type)
-    if "name" in update_data:
-        existing_employee_type = db.query(EmployeeType).filter(EmployeeType.name == update_data["name"], EmployeeType.id != employee_type_id).first()
-        if existing_employee_type:
-            raise HTTPException(status_code=400, detail="Employee Type with this name already exists")
+    EMPLOYEE_TYPE_UNIQUE.check(db, update_data, exclude_id=employee_type_id)
 
     for key, value in update_data.items():
         setattr(db_employee_type, key, value)
 
-    db.commit()
+    EMPLOYEE_TYPE_UNIQUE.commit(db, update_data, exclude_id=employee_type_id)
+    reference_cache.invalidate(EmployeeType)
     db.refresh(db_employee_type)
     return db_employee_type
 @app.put("/employee_types/{employee_type_id}", response_model=readEmployeeType)
@@ -642,15 +831,13 @@ def update_employee_type(employee_type_id: int, employee_type: updateEmployeeTyp
     update_data = employee_type.dict(exclude_unset=True)
 
     # Check for duplicate name (excluding current employee type)
-    if "name" in update_data:
-        existing_employee_type = db.query(EmployeeType).filter(EmployeeType.name == update_data["name"], EmployeeType.id != employee_type_id).first()
-        if existing_employee_type:
-            raise HTTPException(status_code=400, detail="Employee Type with this name already exists")
+    EMPLOYEE_TYPE_UNIQUE.check(db, update_data, exclude_id=employee_type_id)
 
     for key, value in update_data.items():
         setattr(db_employee_type, key, value)
 
-    db.commit()
+    EMPLOYEE_TYPE_UNIQUE.commit(db, update_data, exclude_id=employee_type_id)
+    reference_cache.invalidate(EmployeeType)
     db.refresh(db_employee_type)
     return db_employee_type
 # Use DELETE to deactivate (soft delete)
@@ -661,6 +848,7 @@ def deactivate_employee_type(employee_type_id: int, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="Employee Type not found")
     db_employee_type.is_active = False
     db.commit()
+    reference_cache.invalidate(EmployeeType)
     return {"detail": "Employee Type deactivated"}
 
 class readGrade(BaseModel):
@@ -688,28 +876,31 @@ class updateGrade(BaseModel):
 
     class Config:
         orm_mode = True
-@app.get("/grades", response_model=list[readGrade])
-def read_grades(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    grades = db.query(Grade).filter(Grade.is_active == True).all()
-    return grades
+@app.get("/grades", response_model=Page[readGrade])
+def read_grades(request: Request, is_active: bool = True, page: dict = Depends(page_params), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    grades = reference_cache.get(db, Grade, readGrade)
+    return cached_response(request, grades.etag, grades.page(is_active=is_active, **page))
+
+GRADE_UNIQUE = UniqueFields(Grade, "Grade")
 
 @app.post("/grades", status_code=201, response_model=readGrade)
 def create_grade(grade: createGrade, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    existing_grade = db.query(Grade).filter(Grade.name == grade.name).first()
-    if existing_grade:
-        raise HTTPException(status_code=400, detail="Grade with this name already exists")
-    db_grade = Grade(**grade.dict())
+    data = grade.dict()
+    GRADE_UNIQUE.check(db, data)
+    db_grade = Grade(**data)
     db.add(db_grade)
-    db.commit()
+    GRADE_UNIQUE.commit(db, data)
+    reference_cache.invalidate(Grade)
     db.refresh(db_grade)
     return db_grade
 
 @app.get("/grades/{grade_id}", response_model=readGrade)
-def read_grade(grade_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    db_grade = db.query(Grade).filter(Grade.id == grade_id).first()
+def read_grade(grade_id: int, request: Request, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    grades = reference_cache.get(db, Grade, readGrade)
+    db_grade = grades.by_id.get(grade_id)
     if not db_grade:
         raise HTTPException(status_code=404, detail="Grade not found")
-    return db_grade
+    return cached_response(request, grades.etag, db_grade)
 @app.patch("/grades/{grade_id}", response_model=readGrade)
 def partial_update_grade(grade_id: int, grade: updateGrade, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
     db_grade = db.query(Grade).filter(Grade.id == grade_id).first()
@@ -719,15 +910,13 @@ def partial_update_grade(grade_id: int, grade: updateGrade, db: Session = Depend
     update_data = grade.dict(exclude_unset=True)
 
     # Check for duplicate name (excluding current grade)
-    if "name" in update_data:
-        existing_grade = db.query(Grade).filter(Grade.name == update_data["name"], Grade.id != grade_id).first()
-        if existing_grade:
-            raise HTTPException(status_code=400, detail="Grade with this name already exists")
+    GRADE_UNIQUE.check(db, update_data, exclude_id=grade_id)
 
     for key, value in update_data.items():
         setattr(db_grade, key, value)
 
-    db.commit()
+    GRADE_UNIQUE.commit(db, update_data, exclude_id=grade_id)
+    reference_cache.invalidate(Grade)
     db.refresh(db_grade)
     return db_grade
 
@@ -740,15 +929,13 @@ def update_grade(grade_id: int, grade: updateGrade, db: Session = Depends(get_db
     update_data = grade.dict(exclude_unset=True)
 
     # Check for duplicate name (excluding current grade)
-    if "name" in update_data:
-        existing_grade = db.query(Grade).filter(Grade.name == update_data["name"], Grade.id != grade_id).first()
-        if existing_grade:
-            raise HTTPException(status_code=400, detail="Grade with this name already exists")
+    GRADE_UNIQUE.check(db, update_data, exclude_id=grade_id)
 
     for key, value in update_data.items():
         setattr(db_grade, key, value)
 
-    db.commit()
+    GRADE_UNIQUE.commit(db, update_data, exclude_id=grade_id)
+    reference_cache.invalidate(Grade)
     db.refresh(db_grade)
     return db_grade
 
@@ -760,6 +947,7 @@ def deactivate_grade(grade_id: int, db: Session = Depends(get_db), user_email: s
         raise HTTPException(status_code=404, detail="Grade not found")
     db_grade.is_active = False
     db.commit()
+    reference_cache.invalidate(Grade)
     return {"detail": "Grade deactivated"}
 
 
@@ -784,28 +972,31 @@ class updateDocumentType(BaseModel):
     class Config:
         orm_mode = True
 
-@app.get("/document_types", response_model=list[readDocumentType])
-def read_document_types(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    document_types = db.query(DocumentType).filter(DocumentType.is_active == True).all()
-    return document_types
+@app.get("/document_types", response_model=Page[readDocumentType])
+def read_document_types(request: Request, is_active: bool = True, page: dict = Depends(page_params), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    document_types = reference_cache.get(db, DocumentType, readDocumentType)
+    return cached_response(request, document_types.etag, document_types.page(is_active=is_active, **page))
+
+DOCUMENT_TYPE_UNIQUE = UniqueFields(DocumentType, "Document Type")
 
 @app.post("/document_types", status_code=201, response_model=readDocumentType)
 def create_document_type(document_type: createDocumentType, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    existing_document_type = db.query(DocumentType).filter(DocumentType.name == document_type.name).first()
-    if existing_document_type:
-        raise HTTPException(status_code=400, detail="Document Type with this name already exists")
-    db_document_type = DocumentType(**document_type.dict())
+    data = document_type.dict()
+    DOCUMENT_TYPE_UNIQUE.check(db, data)
+    db_document_type = DocumentType(**data)
     db.add(db_document_type)
-    db.commit()
+    DOCUMENT_TYPE_UNIQUE.commit(db, data)
+    reference_cache.invalidate(DocumentType)
     db.refresh(db_document_type)
     return db_document_type
 
 @app.get("/document_types/{document_type_id}", response_model=readDocumentType)
-def read_document_type(document_type_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    db_document_type = db.query(DocumentType).filter(DocumentType.id == document_type_id).first()
+def read_document_type(document_type_id: int, request: Request, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    document_types = reference_cache.get(db, DocumentType, readDocumentType)
+    db_document_type = document_types.by_id.get(document_type_id)
     if not db_document_type:
         raise HTTPException(status_code=404, detail="Document Type not found")
-    return db_document_type
+    return cached_response(request, document_types.etag, db_document_type)
 
 @app.patch("/document_types/{document_type_id}", response_model=readDocumentType)
 def partial_update_document_type(document_type_id: int, document_type: updateDocumentType, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
@@ -816,15 +1007,13 @@ def partial_update_document_type(document_type_id: int, document_type: updateDoc
     update_data = document_type.dict(exclude_unset=True)
 
     # Check for duplicate name (excluding current document type)
-    if "name" in update_data:
-        existing_document_type = db.query(DocumentType).filter(DocumentType.name == update_data["name"], DocumentType.id != document_type_id).first()
-        if existing_document_type:
-            raise HTTPException(status_code=400, detail="Document Type with this name already exists")
+    DOCUMENT_TYPE_UNIQUE.check(db, update_data, exclude_id=document_type_id)
 
     for key, value in update_data.items():
         setattr(db_document_type, key, value)
 
-    db.commit()
+    DOCUMENT_TYPE_UNIQUE.commit(db, update_data, exclude_id=document_type_id)
+    reference_cache.invalidate(DocumentType)
     db.refresh(db_document_type)
     return db_document_type
 
@@ -836,15 +1025,13 @@ def update_document_type(document_type_id: int, document_type: updateDocumentTyp
 
     update_data = document_type.dict(exclude_unset=True)
     # Check for duplicate name (excluding current document type)
-    if "name" in update_data:
-        existing_document_type = db.query(DocumentType).filter(DocumentType.name == update_data["name"], DocumentType.id != document_type_id).first()
-        if existing_document_type:
-            raise HTTPException(status_code=400, detail="Document Type with this name already exists")
+    DOCUMENT_TYPE_UNIQUE.check(db, update_data, exclude_id=document_type_id)
 
     for key, value in update_data.items():
         setattr(db_document_type, key, value)
 
-    db.commit()
+    DOCUMENT_TYPE_UNIQUE.commit(db, update_data, exclude_id=document_type_id)
+    reference_cache.invalidate(DocumentType)
     db.refresh(db_document_type)
     return db_document_type
 
@@ -856,6 +1043,7 @@ def delete_document_type(document_type_id: int, db: Session = Depends(get_db), u
         raise HTTPException(status_code=404, detail="Document Type not found")
     db_document_type.is_active = False
     db.commit()
+    reference_cache.invalidate(DocumentType)
     return {"detail": "Document Type deactivated"}
 
 class readEmployee(BaseModel):
@@ -1013,29 +1201,183 @@ class updateEmployee(BaseModel):
     class Config:
         orm_mode = True
 
-@app.get("/employees", response_model=list[readEmployee])
-def read_employees(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    employees = db.query(Employee).filter(Employee.is_active == True).all()
-    return employees
+def filter_employees_by_profile(db, query, branch_id=None, department_id=None, grade_id=None):
+    # branch/department/grade live on the employee's active profile
+    profile_filters = []
+    if branch_id is not None:
+        profile_filters.append(EmployeeProfile.branch_id == branch_id)
+    if department_id is not None:
+        profile_filters.append(EmployeeProfile.department_id == department_id)
+    if grade_id is not None:
+        profile_filters.append(EmployeeProfile.grade_id == grade_id)
+    if profile_filters:
+        profile_employee_ids = db.query(EmployeeProfile.employee_id).filter(EmployeeProfile.is_active == True, *profile_filters)
+        query = query.filter(Employee.id.in_(profile_employee_ids))
+    return query
+
+@app.get("/employees", response_model=Page[readEmployee])
+def read_employees(
+    request: Request,
+    response: Response,
+    branch_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    grade_id: Optional[int] = None,
+    is_active: bool = True,
+    fields: Optional[str] = Depends(fields_param),
+    page: dict = Depends(page_params),
+    db: Session = Depends(get_db),
+    user_email: str = Depends(protected_route)
+):
+    employees = db.query(Employee).filter(Employee.is_active == is_active)
+    employees = filter_employees_by_profile(db, employees, branch_id, department_id, grade_id)
+    return conditional_list(request, response, employees, Employee, lambda: keyset_paginate_fields(employees, Employee, readEmployee, fields, **page), page)
+
+EXPORT_BATCH_SIZE = 1000
+
+def _export_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _export_employee_rows(query, columns, export_format):
+    # Own session: the request-scoped one from get_db is closed before the body is streamed
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+            for rows in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue()
+        else:
+            for rows in result.partitions():
+                yield "".join(
+                    json.dumps({column: _export_value(value) for column, value in zip(columns, row)}) + "\n"
+                    for row in rows
+                )
+    finally:
+        db.close()
+
+@app.get("/employees/export")
+def export_employees(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    branch_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    grade_id: Optional[int] = None,
+    is_active: bool = True,
+    db: Session = Depends(get_db),
+    user_email: str = Depends(protected_route)
+):
+    columns = list(readEmployee.model_fields)
+    # Plain column rows, no ORM identity map, fetched in EXPORT_BATCH_SIZE chunks
+    employees = db.query(*[getattr(Employee, column) for column in columns]).filter(Employee.is_active == is_active)
+    employees = filter_employees_by_profile(db, employees, branch_id, department_id, grade_id)
+    query = employees.order_by(Employee.id).statement
+    if export_format == "csv":
+        media_type, filename = "text/csv", "employees.csv"
+    else:
+        media_type, filename = "application/x-ndjson", "employees.ndjson"
+    return StreamingResponse(
+        _export_employee_rows(query, columns, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# every unique column: email, phone, employee_code, the identity numbers, ...
+EMPLOYEE_UNIQUE = UniqueFields(Employee, "Employee")
 
 @app.post("/employees", status_code=201, response_model=readEmployee)
 def create_employee(employee: createEmployee, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    # Check for duplicate email, phone
-    if employee.email:
-        existing_employee_email = db.query(Employee).filter(Employee.email == employee.email).first()
-        if existing_employee_email:
-            raise HTTPException(status_code=400, detail="Employee with this email already exists")
-    if employee.phone:
-        existing_employee_phone = db.query(Employee).filter(Employee.phone == employee.phone).first()
-        if existing_employee_phone:
-            raise HTTPException(status_code=400, detail="Employee with this phone already exists")
-    
-    db_employee = Employee(**employee.model_dump())
+    # Check for duplicate email, phone, employee code, ...
+    data = employee.model_dump()
+    EMPLOYEE_UNIQUE.check(db, data)
+    db_employee = Employee(**data)
     db.add(db_employee)
-    db.commit()
+    EMPLOYEE_UNIQUE.commit(db, data)
     db.refresh(db_employee)
     return db_employee
 
+@app.get("/employees/search", response_model=Page[readEmployee])
+def search_employees(
+    q: str = Query(..., min_length=1, max_length=200),
+    is_active: bool = True,
+    page: dict = Depends(page_params),
+    db: Session = Depends(get_db),
+    user_email: str = Depends(protected_route)
+):
+    employee_ids, next_cursor = search_employee_ids(db, q, is_active=is_active, **page)
+    employees = {employee.id: employee for employee in db.query(Employee).filter(Employee.id.in_(employee_ids))}
+    return {"items": [employees[employee_id] for employee_id in employee_ids], "next_cursor": next_cursor}
+
+BULK_INSERT_BATCH_SIZE = 500
+BULK_LOOKUP_BATCH_SIZE = 500
+EMPLOYEE_UNIQUE_FIELDS = EMPLOYEE_UNIQUE.fields
+
+def _find_existing_values(db, column, values):
+    # One IN (...) per chunk instead of one SELECT per row
+    values = list(values)
+    existing = set()
+    for start in range(0, len(values), BULK_LOOKUP_BATCH_SIZE):
+        chunk = values[start:start + BULK_LOOKUP_BATCH_SIZE]
+        existing.update(value for (value,) in db.query(column).filter(column.in_(chunk)))
+    return existing
+
+def bulk_import_employees(db, rows):
+    errors = {}
+    valid = {}
+    for index, row in enumerate(rows):
+        try:
+            valid[index] = createEmployee.model_validate(row).model_dump()
+        except ValidationError as exc:
+            errors[index] = [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()]
+
+    # Duplicates inside the upload itself: the first occurrence wins
+    seen = {field: {} for field in EMPLOYEE_UNIQUE_FIELDS}
+    for index, data in valid.items():
+        for field in EMPLOYEE_UNIQUE_FIELDS:
+            value = data.get(field)
+            if value is None:
+                continue
+            if value in seen[field]:
+                errors.setdefault(index, []).append(f"{field}: duplicates row {seen[field][value]} in this upload")
+            else:
+                seen[field][value] = index
+
+    # Duplicates against the database, one set-based lookup per unique column
+    for field in EMPLOYEE_UNIQUE_FIELDS:
+        if not seen[field]:
+            continue
+        for value in _find_existing_values(db, getattr(Employee, field), seen[field]):
+            errors.setdefault(seen[field][value], []).append(f"{field}: Employee with this {field} already exists")
+
+    to_insert = [data for index, data in valid.items() if index not in errors]
+    for start in range(0, len(to_insert), BULK_INSERT_BATCH_SIZE):
+        db.execute(insert(Employee), to_insert[start:start + BULK_INSERT_BATCH_SIZE])
+    db.commit()
+
+    return {
+        "total": len(rows),
+        "inserted": len(to_insert),
+        "failed": len(errors),
+        "errors": [{"row": index, "errors": errors[index]} for index in sorted(errors)],
+    }
+
+@app.post("/employees/bulk")
+def bulk_create_employees(employees: list[dict], db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    return bulk_import_employees(db, employees)
+
+@app.post("/employees/import")
+def import_employees_csv(file: UploadFile = File(...), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig"))
+    # Blank CSV cells mean "not provided", same as a missing JSON key
+    rows = [{key: value for key, value in row.items() if value not in ("", None)} for row in reader]
+    return bulk_import_employees(db, rows)
+
 @app.get("/employees/{employee_id}", response_model=readEmployee)
 def read_employee(employee_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
     db_employee = db.query(Employee).filter(Employee.id == employee_id).first()
@@ -1052,23 +1394,12 @@ def partial_update_employee(employee_id: int, employee: updateEmployee, db: Sess
     update_data = employee.model_dump(exclude_unset=True)
 
     # Check for duplicate email, phone or employee code (excluding current employee)
-    if "email" in update_data:
-        existing_employee_email = db.query(Employee).filter(Employee.email == update_data["email"], Employee.id != employee_id).first()
-        if existing_employee_email:
-            raise HTTPException(status_code=400, detail="Employee with this email already exists")
-    if "phone" in update_data:
-        existing_employee_phone = db.query(Employee).filter(Employee.phone == update_data["phone"], Employee.id != employee_id).first()
-        if existing_employee_phone:
-            raise HTTPException(status_code=400, detail="Employee with this phone already exists")
-    if "employee_code" in update_data:
-        existing_employee_code = db.query(Employee).filter(Employee.employee_code == update_data["employee_code"], Employee.id != employee_id).first()
-        if existing_employee_code:
-            raise HTTPException(status_code=400, detail="Employee with this employee code already exists")
+    EMPLOYEE_UNIQUE.check(db, update_data, exclude_id=employee_id)
 
     for key, value in update_data.items():
         setattr(db_employee, key, value)
 
-    db.commit()
+    EMPLOYEE_UNIQUE.commit(db, update_data, exclude_id=employee_id)
     db.refresh(db_employee)
     return db_employee
 
@@ -1082,23 +1413,12 @@ def update_employee(employee_id: int, employee: updateEmployee, db: Session = De
     update_data = employee.model_dump(exclude_unset=True)
 
     # Check for duplicate email, phone or employee code (excluding current employee)
-    if "email" in update_data:
-        existing_employee_email = db.query(Employee).filter(Employee.email == update_data["email"], Employee.id != employee_id).first()
-        if existing_employee_email:
-            raise HTTPException(status_code=400, detail="Employee with this email already exists")
-    if "phone" in update_data:
-        existing_employee_phone = db.query(Employee).filter(Employee.phone == update_data["phone"], Employee.id != employee_id).first()
-        if existing_employee_phone:
-            raise HTTPException(status_code=400, detail="Employee with this phone already exists")
-    if "employee_code" in update_data:
-        existing_employee_code = db.query(Employee).filter(Employee.employee_code == update_data["employee_code"], Employee.id != employee_id).first()
-        if existing_employee_code:
-            raise HTTPException(status_code=400, detail="Employee with this employee code already exists")
+    EMPLOYEE_UNIQUE.check(db, update_data, exclude_id=employee_id)
 
     for key, value in update_data.items():
         setattr(db_employee, key, value)
 
-    db.commit()
+    EMPLOYEE_UNIQUE.commit(db, update_data, exclude_id=employee_id)
     db.refresh(db_employee)
     return db_employee
 
@@ -1109,8 +1429,13 @@ def deactivate_employee(employee_id: int, db: Session = Depends(get_db), user_em
     if not db_employee:
         raise HTTPException(status_code=404, detail="Employee not found")
 
+    was_active = db_employee.is_active
+    headcount_change = HeadcountChange(db, employee_id)
     db_employee.is_active = False
+    headcount_change.apply()
     db.commit()
+    if was_active:
+        org_chart.remove(employee_id)
     return {"detail": "Employee deactivated"}
 
 ######################################## Employee Profile CRUD Operations #####################################################
@@ -1125,6 +1450,7 @@ class BaseEmployeeProfile(BaseModel):
     reporting_manager_id: int
     work_location: str
     shift_timing: str
+    salary: Optional[float] = Field(None, ge=0)
     effective_date: date
 
 class readEmployeeProfile(BaseEmployeeProfile):
@@ -1146,15 +1472,85 @@ class updateEmployeeProfile(BaseModel):
     reporting_manager_id: Optional[int] = None
     work_location: Optional[str] = None
     shift_timing: Optional[str] = None
+    salary: Optional[float] = Field(None, ge=0)
     effective_date: Optional[date] = None
 
     class Config:
         orm_mode = True
 
-@app.get("/employeeprofile", response_model=list[readEmployeeProfile])
-def read_employee_profile(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    employee_profiles = db.query(EmployeeProfile).filter(EmployeeProfile.is_active == True).all()
-    return employee_profiles
+def check_reporting_line(db, employee_id, manager_id):
+    try:
+        org_chart.check_manager(db, employee_id, manager_id)
+    except ReportingCycle as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+def _org_chart_items(db, entries):
+    # entries are (employee_id, depth); one query for the names on this page
+    ids = [employee_id for employee_id, _ in entries]
+    names = {row.id: row for row in db.query(Employee.id, Employee.name, Employee.employee_code).filter(Employee.id.in_(ids))}
+    return [
+        {
+            "employee_id": employee_id,
+            "depth": depth,
+            "name": names[employee_id].name if employee_id in names else None,
+            "employee_code": names[employee_id].employee_code if employee_id in names else None,
+        }
+        for employee_id, depth in entries
+    ]
+
+@app.get("/employees/{employee_id}/reports")
+def read_employee_reports(
+    employee_id: int,
+    max_depth: Optional[int] = Query(None, ge=1),
+    page: dict = Depends(page_params),
+    db: Session = Depends(get_db),
+    user_email: str = Depends(protected_route)
+):
+    subtree = org_chart.subtree(db, employee_id, max_depth)
+    start = decode_cursor_values(page["cursor"]).get("offset") if page["cursor"] else 0
+    if type(start) is not int or start < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    end = start + page["limit"]
+    return {
+        "employee_id": employee_id,
+        "headcount": len(subtree),
+        "items": _org_chart_items(db, subtree[start:end]),
+        "next_cursor": encode_cursor_values({"offset": end}) if end < len(subtree) else None,
+    }
+
+@app.get("/employees/{employee_id}/managers")
+def read_employee_managers(employee_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    chain = org_chart.chain(db, employee_id)
+    return {"employee_id": employee_id, "items": _org_chart_items(db, [(manager_id, level) for level, manager_id in enumerate(chain, start=1)])}
+
+@app.get("/employees/{employee_id}/org-stats")
+def read_employee_org_stats(employee_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    return org_chart.stats(db, employee_id)
+
+@app.get("/employeeprofile", response_model=Page[readEmployeeProfile])
+def read_employee_profile(
+    request: Request,
+    response: Response,
+    employee_id: Optional[int] = None,
+    branch_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    grade_id: Optional[int] = None,
+    is_active: bool = True,
+    fields: Optional[str] = Depends(fields_param),
+    page: dict = Depends(page_params),
+    db: Session = Depends(get_db),
+    user_email: str = Depends(protected_route)
+):
+    employee_profiles = db.query(EmployeeProfile).filter(EmployeeProfile.is_active == is_active)
+    if employee_id is not None:
+        employee_profiles = employee_profiles.filter(EmployeeProfile.employee_id == employee_id)
+    if branch_id is not None:
+        employee_profiles = employee_profiles.filter(EmployeeProfile.branch_id == branch_id)
+    if department_id is not None:
+        employee_profiles = employee_profiles.filter(EmployeeProfile.department_id == department_id)
+    if grade_id is not None:
+        employee_profiles = employee_profiles.filter(EmployeeProfile.grade_id == grade_id)
+    return conditional_list(request, response, employee_profiles, EmployeeProfile, lambda: keyset_paginate_fields(employee_profiles, EmployeeProfile, readEmployeeProfile, fields, **page), page)
 
 @app.post("/employeeprofile", status_code=201, response_model=readEmployeeProfile)
 def create_employeeprofile(employee_profile: createEmployeeProfile, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
@@ -1173,6 +1569,8 @@ def create_employeeprofile(employee_profile: createEmployeeProfile, db: Session
     ).first()
     if existing_employee_profile:
         raise HTTPException(status_code=400, detail="Employee profile with same data already exists.")
+    check_reporting_line(db, employee_profile.employee_id, employee_profile.reporting_manager_id)
+    headcount_change = HeadcountChange(db, employee_profile.employee_id)
 
     # Deactivate previous active profile for this employee (if any)
     previous_active_profile = db.query(EmployeeProfile).filter(
@@ -1181,11 +1579,13 @@ def create_employeeprofile(employee_profile: createEmployeeProfile, db: Session
     ).first()
     if previous_active_profile:
         previous_active_profile.is_active = False
-        db.commit()
+        db.flush()
 
     db_employee_profile = EmployeeProfile(**employee_profile.model_dump())
     db.add(db_employee_profile)
+    headcount_change.apply()
     db.commit()
+    org_chart.set_manager(db_employee_profile.employee_id, db_employee_profile.reporting_manager_id)
     db.refresh(db_employee_profile)
     return db_employee_profile
 
@@ -1202,9 +1602,18 @@ def update_employee_profile_partial(profile_id: int, profile: updateEmployeeProf
     if not db_profile:
         raise HTTPException(status_code=404, detail="Employee profile not found")
     update_data = profile.model_dump(exclude_unset=True)
+    previous_employee_id = db_profile.employee_id
+    if db_profile.is_active and ("reporting_manager_id" in update_data or "employee_id" in update_data):
+        check_reporting_line(db, update_data.get("employee_id", db_profile.employee_id), update_data.get("reporting_manager_id", db_profile.reporting_manager_id))
+    headcount_change = HeadcountChange(db, previous_employee_id, update_data.get("employee_id"))
     for key, value in update_data.items():
         setattr(db_profile, key, value)
+    headcount_change.apply()
     db.commit()
+    if db_profile.is_active:
+        if db_profile.employee_id != previous_employee_id:
+            org_chart.remove(previous_employee_id)
+        org_chart.set_manager(db_profile.employee_id, db_profile.reporting_manager_id)
     db.refresh(db_profile)
     return db_profile
 
@@ -1213,8 +1622,13 @@ def deactivate_employee_profile(profile_id: int, db: Session = Depends(get_db),
     db_profile = db.query(EmployeeProfile).filter(EmployeeProfile.id == profile_id).first()
     if not db_profile:
         raise HTTPException(status_code=404, detail="Employee profile not found")
+    was_active = db_profile.is_active
+    headcount_change = HeadcountChange(db, db_profile.employee_id)
     db_profile.is_active = False
+    headcount_change.apply()
     db.commit()
+    if was_active:
+        org_chart.remove(db_profile.employee_id)
     return {"detail": "Employee profile deactivated"}
 
 ########## employee bank detail 16-09-2025 ##########
@@ -1251,28 +1665,32 @@ class updateBankDetail(BaseModel):
     class Config:
         orm_mode =True
 
-@app.get("/employeebankdetails", response_model=list[readBankDetail])
-def read_employee_bank_details(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
-    db_bank_details = db.query(BankDetail).filter(BankDetail.is_active == True).order_by(BankDetail.account_type.desc()).all()
-    return db_bank_details
+@app.get("/employeebankdetails", response_model=Page[readBankDetail])
+def read_employee_bank_details(request: Request, response: Response, employee_id: Optional[int] = None, is_active: bool = True, page: dict = Depends(page_params), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    db_bank_details = db.query(BankDetail).filter(BankDetail.is_active == is_active)
+    if employee_id is not None:
+        db_bank_details = db_bank_details.filter(BankDetail.employee_id == employee_id)
+    return conditional_list(request, response, db_bank_details, BankDetail, lambda: keyset_paginate(db_bank_details, BankDetail, descending=True, order_by=BankDetail.account_type, **page), page, descending=True, order_by=BankDetail.account_type)
 
 @app.get("/employeebankdetail/{bankdetail_id}", response_model=readBankDetail)
 def read_employee_bank_details(bankdetail_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
     db_bank_details = db.query(BankDetail).filter(BankDetail.is_active == True, BankDetail.id == bankdetail_id).first()
+    if not db_bank_details:
+        raise HTTPException(status_code=404, detail="Bank Detail not found")
     return db_bank_details
             
     
     
+BANK_DETAIL_UNIQUE = UniqueFields(BankDetail, "Bank Detail", messages={"account_number": "Account number ({value}) already exists."})
+
 @app.post("/employeebankdetail", status_code=201, response_model= readBankDetail)
 def create_employee_bank_detail(bank_detail : createBankDetail, db:Session=Depends(get_db), user_email:str=Depends(protected_route)):
     ## check duplicate account
-    existing_bank = db.query(BankDetail).filter(BankDetail.account_number == bank_detail.account_number).first()
-    if existing_bank:
-       raise HTTPException(status_code=400, detail=f"Account number ({bank_detail.account_number}) already exists.") 
-   
-    db_bank_detail = BankDetail(**bank_detail.model_dump())
+    data = bank_detail.model_dump()
+    BANK_DETAIL_UNIQUE.check(db, data)
+    db_bank_detail = BankDetail(**data)
     db.add(db_bank_detail)
-    db.commit()
+    BANK_DETAIL_UNIQUE.commit(db, data)
     db.refresh(db_bank_detail)
     return db_bank_detail
 
@@ -1288,9 +1706,10 @@ def partial_update_employee_bank_detail(
     if not db_bank_detail:
         raise HTTPException(status_code=404, detail="Bank Detail not Found.")
     update_bank_detail = bank_detail.model_dump(exclude_unset=True)
+    BANK_DETAIL_UNIQUE.check(db, update_bank_detail, exclude_id=bankdetail_id)
     for key, value in update_bank_detail.items():
         setattr(db_bank_detail, key, value)
-    db.commit()
+    BANK_DETAIL_UNIQUE.commit(db, update_bank_detail, exclude_id=bankdetail_id)
     db.refresh(db_bank_detail)
     return db_bank_detail
 
@@ -1336,10 +1755,43 @@ class updateDocument(BaseModel):
     class Config:
         orm_mode= True
         
-@app.get("/employeedocuments", response_model=list[readDocument])
-def employee_documents(db:Session = Depends(get_db), user_email:str =Depends(protected_route)):
-    db_document = db.query(Document).filter(Document.is_active == True).order_by(Document.created_at.desc())
-    return db_document
+@app.get("/employeedocuments", response_model=Page[readDocument])
+def employee_documents(request: Request, response: Response, employee_id: Optional[int] = None, is_active: bool = True, page: dict = Depends(page_params), db:Session = Depends(get_db), user_email:str =Depends(protected_route)):
+    db_document = db.query(Document).filter(Document.is_active == is_active)
+    if employee_id is not None:
+        db_document = db_document.filter(Document.employee_id == employee_id)
+    # newest first, as before
+    return conditional_list(request, response, db_document, Document, lambda: keyset_paginate(db_document, Document, descending=True, **page), page, descending=True)
+
+class readDocumentExpiryBucket(BaseModel):
+    document_type_id: int
+    bucket: str
+    documents: int
+
+    class Config:
+        orm_mode = True
+
+class readDocumentExpirySummary(BaseModel):
+    as_of: Optional[date] = None
+    computed_at: Optional[datetime] = None
+    buckets: list[readDocumentExpiryBucket]
+
+@app.get("/employeedocuments/expiring", response_model=Page[readDocument])
+def expiring_employee_documents(within_days: int = Query(30, ge=0, le=3650), document_type_id: Optional[int] = None, employee_id: Optional[int] = None, page: dict = Depends(page_params), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    db_document = db.query(Document)
+    if document_type_id is not None:
+        db_document = db_document.filter(Document.document_type_id == document_type_id)
+    if employee_id is not None:
+        db_document = db_document.filter(Document.employee_id == employee_id)
+    return expiring_documents(db_document, within_days, **page)
+
+# Precomputed by the expiry sweep: expired / 0-7 / 8-30 / 31-60 / 61-90 days, per document type
+@app.get("/employeedocuments/expiring/summary", response_model=readDocumentExpirySummary)
+def expiring_employee_documents_summary(db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    buckets = db.query(DocumentExpiryBucket).order_by(DocumentExpiryBucket.document_type_id, DocumentExpiryBucket.id).all()
+    if not buckets:
+        return {"buckets": []}
+    return {"as_of": buckets[0].as_of, "computed_at": buckets[0].computed_at, "buckets": buckets}
 
 @app.get("/employeedocument/{document_id}", response_model= readDocument)
 def employee_document(document_id:int, db: Session=Depends(get_db), user_email:str = Depends(protected_route)):
@@ -1348,14 +1800,36 @@ def employee_document(document_id:int, db: Session=Depends(get_db), user_email:s
         raise HTTPException(status_code=404,detail= "Document Not Found.")
     return db_document
 
-@app.post("/employeedocument",status_code=201, response_model= readDocument)
-def create_employee_document(document: createDocument, db:Session=Depends(get_db), user_email :str = Depends(protected_route)):
-    db_document = Document(**document.model_dump())
+def _add_document(db, data):
+    db_document = Document(**data)
     db.add(db_document)
-    db.commit
+    db.commit()
     db.refresh(db_document)
     return db_document
 
+@app.post("/employeedocument",status_code=201, response_model= readDocument)
+def create_employee_document(document: createDocument, db:Session=Depends(get_db), user_email :str = Depends(protected_route)):
+    return _add_document(db, document.model_dump())
+
+def _validate_document_upload(fields, reference):
+    # before the file is stored, so a 422 leaves nothing behind
+    try:
+        return createDocument.model_validate({**fields, "document_file": reference})
+    except ValidationError as exc:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in exc.errors()])
+
+@app.post("/employeedocument/upload", status_code=201, response_model=readDocument, openapi_extra=upload_request_body(
+    employee_id={"type": "integer"}, document_type_id={"type": "integer"},
+    issue_date={"type": "string", "format": "date"}, expiry_date={"type": "string", "format": "date"},
+    is_verified={"type": "boolean"},
+))
+async def upload_employee_document(request: Request, db: Session = Depends(get_db), user_email: str = Depends(protected_route_async)):
+    # the scan and the document fields in one multipart request; document_file becomes the stored file's URL
+    document, stored = await receive_upload(request, validate=_validate_document_upload)
+    db_document = await run_in_threadpool(_add_document, db, document.model_dump())
+    schedule_derivatives(stored.sha256)
+    return db_document
+
 @app.patch("/employeedocument/{document_id}", response_model= readDocument)
 def partial_update_employee_document(document_id:int , document: updateDocument, db:Session=Depends(get_db), user_email:str = Depends(protected_route)):
     db_document = db.query(Document).filter(Document.is_active == True, Document.id == document_id).first()
@@ -1377,6 +1851,34 @@ def deactivate_employee_document(document_id:int, db:Session=Depends(get_db),use
     db.commit
     db.refresh(db_document)
     return None
+######################## File storage #################
+# Uploads are content-addressed (see app/storage.py): POST /files returns the URL to put in
+# Document.document_file, Employee.profile_picture, disability_certificate_file, ...
+
+class readStoredFile(BaseModel):
+    url: str
+    sha256: str
+    size: int
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    # False when identical content was already stored
+    created: bool
+
+@app.post("/files", status_code=201, response_model=readStoredFile, openapi_extra=upload_request_body())
+async def upload_file(request: Request, user_email: str = Depends(protected_route_async)):
+    _, stored = await receive_upload(request)
+    schedule_derivatives(stored.sha256)
+    return {**stored._asdict(), "url": stored.reference}
+
+@app.get("/files/{name}")
+def download_file(name: str, user_email: str = Depends(protected_route)):
+    return file_response(name)
+
+# <url>/thumbnail (small square JPEG) for list rows, <url>/preview for detail screens
+@app.get("/files/{name}/{kind}")
+async def download_file_derivative(name: str, kind: Literal[DERIVATIVE_KINDS], user_email: str = Depends(protected_route_async)):
+    return await derivative_response(name, kind)
+
 #######################  WorkExperience ####################
 
 class baseWorkExperience(BaseModel):
@@ -1387,12 +1889,12 @@ class baseWorkExperience(BaseModel):
     end_date : date
     responsibilities : str
     
-class readWorkExperience(baseBankDetail):
+class readWorkExperience(baseWorkExperience):
     id: int
     class Config:
         orm_mode=True
     
-class createWorkExperience(baseBankDetail):
+class createWorkExperience(baseWorkExperience):
     pass
     class Config:
         orm_mode=True
@@ -1407,10 +1909,12 @@ class updateWorkExperience(BaseModel):
     class Config:
         orm_mode = True
 
-@app.get("/employeeworkexperience", response_model=list[readWorkExperience])
-def read_employee_work_experience(db:Session=Depends(get_db), user_email:str=Depends(protected_route)):
-    db_work_experience = db.query(WorkExperience).filter(WorkExperience.is_active == True).order_by(WorkExperience.start_date.desc()).all()
-    return db_work_experience
+@app.get("/employeeworkexperience", response_model=Page[readWorkExperience])
+def read_employee_work_experience(request: Request, response: Response, employee_id: Optional[int] = None, is_active: bool = True, page: dict = Depends(page_params), db:Session=Depends(get_db), user_email:str=Depends(protected_route)):
+    db_work_experience = db.query(WorkExperience).filter(WorkExperience.is_active == is_active)
+    if employee_id is not None:
+        db_work_experience = db_work_experience.filter(WorkExperience.employee_id == employee_id)
+    return conditional_list(request, response, db_work_experience, WorkExperience, lambda: keyset_paginate(db_work_experience, WorkExperience, descending=True, order_by=WorkExperience.start_date, **page), page, descending=True, order_by=WorkExperience.start_date)
 
 @app.get("/employeeworkexperience/{workexperience_id}", response_model= readWorkExperience)
 def employee_work_experience(workexperience_id:int, db:Session=Depends(get_db), user_email:str=Depends(protected_route)):
@@ -1490,10 +1994,12 @@ class updateEducation(BaseModel):
        orm_mode = True
        
 
-@app.get("/employeeEducation", response_model=list[readEducation])
-def read_employee_Education(db:Session=Depends(get_db), user_email:str=Depends(protected_route)):
-    db_Education = db.query(Education).filter(Education.is_active == True).order_by(Education.start_date.desc()).all()
-    return db_Education
+@app.get("/employeeEducation", response_model=Page[readEducation])
+def read_employee_Education(request: Request, response: Response, employee_id: Optional[int] = None, is_active: bool = True, page: dict = Depends(page_params), db:Session=Depends(get_db), user_email:str=Depends(protected_route)):
+    db_Education = db.query(Education).filter(Education.is_active == is_active)
+    if employee_id is not None:
+        db_Education = db_Education.filter(Education.employee_id == employee_id)
+    return conditional_list(request, response, db_Education, Education, lambda: keyset_paginate(db_Education, Education, descending=True, order_by=Education.start_date, **page), page, descending=True, order_by=Education.start_date)
 
 @app.get("/employeeEducation/{education_id}", response_model= readEducation)
 def employee_Education(education_id:int, db:Session=Depends(get_db), user_email:str=Depends(protected_route)):
@@ -1531,8 +2037,195 @@ def delete_employee_Education(education_id:int, db:Session=Depends(get_db), user
     
     db.commit()
     db.refresh(db_employee_Education)
-    return {'details': "Data Deleted Sucessfully."} 
+    return {'details': "Data Deleted Sucessfully."}
 
-   
-    
-    
\ No newline at end of file
+######################################## Employee 360 #####################################################
+
+class readEmployeeManager(BaseModel):
+    id: int
+    name: str
+    employee_code: Optional[str] = None
+    official_email: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+class readEmployeeProfileFull(readEmployeeProfile):
+    # None when the referenced row is missing (SQLite doesn't enforce the foreign keys)
+    designation: Optional[readDesignation] = None
+    department: Optional[readDepartment] = None
+    branch: Optional[readBranch] = None
+    grade: Optional[readGrade] = None
+    reporting_manager: Optional[readEmployeeManager] = None
+
+class readEmployeeFull(readEmployee):
+    profile: Optional[readEmployeeProfileFull] = None
+    bank_details: list[readBankDetail] = []
+    documents: list[readDocument] = []
+    work_experiences: list[readWorkExperience] = []
+    educations: list[readEducation] = []
+
+@app.get("/employees/{employee_id}/full", response_model=readEmployeeFull)
+def read_employee_full(employee_id: int, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    # One query for the employee and one per relationship (six in total), whatever
+    # the number of rows; the profile's lookups are joined into the profile query
+    db_employee = (
+        db.query(Employee)
+        .options(
+            selectinload(Employee.profile).options(
+                joinedload(EmployeeProfile.designation),
+                joinedload(EmployeeProfile.department),
+                joinedload(EmployeeProfile.branch),
+                joinedload(EmployeeProfile.grade),
+                joinedload(EmployeeProfile.reporting_manager),
+            ),
+            selectinload(Employee.bank_details.and_(BankDetail.is_active == True)),
+            selectinload(Employee.documents.and_(Document.is_active == True)),
+            selectinload(Employee.work_experiences.and_(WorkExperience.is_active == True)),
+            selectinload(Employee.educations.and_(Education.is_active == True)),
+        )
+        .filter(Employee.id == employee_id)
+        .first()
+    )
+    if not db_employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return db_employee
+
+######################################## Analytics #####################################################
+
+# headcount_cells is only maintained by the sync handlers; with DB_MODE=async the
+# dashboards count live rather than read totals that may be stale until restart
+HEADCOUNT_LIVE = DB_MODE == "async"
+
+def analytics_window(start: Optional[date] = Query(None, alias="from"), end: Optional[date] = Query(None, alias="to")):
+    end = end or date.today()
+    start = start or end.replace(day=1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return start, end
+
+@app.get("/analytics/headcount")
+def headcount_dashboard(by: list[Literal[DIMENSIONS]] = Query([]), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    return headcount(db, by, live=HEADCOUNT_LIVE)
+
+@app.get("/analytics/joiners")
+def joiners_dashboard(window: tuple = Depends(analytics_window), by: list[Literal[DIMENSIONS]] = Query([]), period: Literal[PERIODS] = "month", db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    return joiners(db, *window, by, period)
+
+@app.get("/analytics/attrition")
+def attrition_dashboard(window: tuple = Depends(analytics_window), by: list[Literal[DIMENSIONS]] = Query([]), period: Literal[PERIODS] = "month", db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    return attrition(db, *window, by, period, live=HEADCOUNT_LIVE)
+
+######################################## Payroll #####################################################
+
+class raiseScenario(BaseModel):
+    # a cut of more than 100% would make salaries negative
+    percent: float = Field(0.0, ge=-100)
+    # grade_id -> percent, instead of percent for that grade
+    grade_percent: dict[int, Annotated[float, Field(ge=-100)]] = {}
+    cap_to_band: bool = False
+    by: list[Literal[DIMENSIONS]] = []
+
+@app.get("/payroll/cost")
+def payroll_cost(by: list[Literal[DIMENSIONS]] = Query([]), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    return load_payroll(db).cost(by)
+
+@app.get("/payroll/band-violations")
+def payroll_band_violations(limit: int = Query(50, ge=1, le=1000), db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    return load_payroll(db).band_violations(limit)
+
+@app.post("/payroll/raise-scenario")
+def payroll_raise_scenario(scenario: raiseScenario, db: Session = Depends(get_db), user_email: str = Depends(protected_route)):
+    return load_payroll(db).raise_scenario(scenario.percent, scenario.grade_percent, scenario.cap_to_band, scenario.by)
+
+######################################## Async CRUD (DB_MODE=async) #####################################################
+
+async def check_reporting_line_async(employee_id, manager_id):
+    # org_chart reads through a sync session, so the check runs in the threadpool
+    def check():
+        with SessionLocal() as db:
+            check_reporting_line(db, employee_id, manager_id)
+    await run_in_threadpool(check)
+
+async def before_create_employee_profile(db, data):
+    # Same rules as create_employeeprofile: reject an identical active profile, check
+    # the reporting line, then deactivate the employee's previous active profile
+    duplicate = select(EmployeeProfile.id).where(
+        EmployeeProfile.is_active == True,
+        *[getattr(EmployeeProfile, key) == value for key, value in data.items() if key != "effective_date"],
+    )
+    if (await db.execute(duplicate.limit(1))).first():
+        raise HTTPException(status_code=400, detail="Employee profile with same data already exists.")
+    await check_reporting_line_async(data["employee_id"], data["reporting_manager_id"])
+    await db.execute(
+        update(EmployeeProfile)
+        .where(EmployeeProfile.employee_id == data["employee_id"], EmployeeProfile.is_active == True)
+        .values(is_active=False)
+    )
+
+async def before_update_employee_profile(db, profile, data):
+    if profile.is_active and ("reporting_manager_id" in data or "employee_id" in data):
+        await check_reporting_line_async(data.get("employee_id", profile.employee_id), data.get("reporting_manager_id", profile.reporting_manager_id))
+
+async def after_employee_profile_write(profile, previous):
+    # The sync handlers' incremental org chart upkeep, once the write is committed
+    previous = previous or {}
+    if not profile.is_active:
+        if previous.get("is_active"):
+            org_chart.remove(profile.employee_id)
+        return
+    previous_employee_id = previous.get("employee_id", profile.employee_id)
+    if previous_employee_id != profile.employee_id:
+        org_chart.remove(previous_employee_id)
+    org_chart.set_manager(profile.employee_id, profile.reporting_manager_id)
+
+async def after_employee_write(employee, previous):
+    # deactivating an employee takes them out of the org chart, as the sync handler does
+    if (previous or {}).get("is_active") and not employee.is_active:
+        org_chart.remove(employee.id)
+
+def _active_profile_filter(column):
+    def clause(value):
+        return Employee.id.in_(select(EmployeeProfile.employee_id).where(EmployeeProfile.is_active == True, column == value))
+    return clause
+
+# Reference tables (branches, departments, grades, ...) stay on the sync handlers:
+# their reads are served from reference_cache and never reach the database.
+ASYNC_CRUD_SPECS = [
+    AsyncCrudSpec(Company, CompanyRead, CompanyCreate, CompanyUpdate, "Company", "/companies", "/companies/{id}"),
+    AsyncCrudSpec(Project, readProject, createProject, updateProject, "Project", "/projects", "/projects/{id}",
+                  unique=PROJECT_UNIQUE),
+    AsyncCrudSpec(Employee, readEmployee, createEmployee, updateEmployee, "Employee", "/employees", "/employees/{id}",
+                  unique=EMPLOYEE_UNIQUE, after_write=after_employee_write,
+                  filters={
+                      "branch_id": _active_profile_filter(EmployeeProfile.branch_id),
+                      "department_id": _active_profile_filter(EmployeeProfile.department_id),
+                      "grade_id": _active_profile_filter(EmployeeProfile.grade_id),
+                  }),
+    AsyncCrudSpec(EmployeeProfile, readEmployeeProfile, createEmployeeProfile, updateEmployeeProfile, "Employee profile",
+                  "/employeeprofile", "/employeeprofile/{id}",
+                  filters={
+                      "employee_id": EmployeeProfile.employee_id,
+                      "branch_id": EmployeeProfile.branch_id,
+                      "department_id": EmployeeProfile.department_id,
+                      "grade_id": EmployeeProfile.grade_id,
+                  },
+                  before_create=before_create_employee_profile, before_update=before_update_employee_profile,
+                  after_write=after_employee_profile_write),
+    AsyncCrudSpec(BankDetail, readBankDetail, createBankDetail, updateBankDetail, "Bank Detail",
+                  "/employeebankdetails", "/employeebankdetail/{id}", create_path="/employeebankdetail",
+                  unique=BANK_DETAIL_UNIQUE, filters={"employee_id": BankDetail.employee_id},
+                  descending=True, order_by=BankDetail.account_type, active_only=True),
+    AsyncCrudSpec(Document, readDocument, createDocument, updateDocument, "Document",
+                  "/employeedocuments", "/employeedocument/{id}", create_path="/employeedocument",
+                  filters={"employee_id": Document.employee_id}, descending=True, active_only=True),
+    AsyncCrudSpec(WorkExperience, readWorkExperience, createWorkExperience, updateWorkExperience, "Work Experience",
+                  "/employeeworkexperience", "/employeeworkexperience/{id}", filters={"employee_id": WorkExperience.employee_id},
+                  descending=True, order_by=WorkExperience.start_date, active_only=True),
+    AsyncCrudSpec(Education, readEducation, createEducation, updateEducation, "Education",
+                  "/employeeEducation", "/employeeEducation/{id}", filters={"employee_id": Education.employee_id},
+                  descending=True, order_by=Education.start_date, active_only=True),
+]
+
+if DB_MODE == "async":
+    replace_routes(app, build_async_crud_router(ASYNC_CRUD_SPECS, get_async_db, protected_route_async))
@@ -1,9 +1,26 @@
 from .database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Boolean, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Boolean, Date, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy import event
 
+# Nearly every query filters on is_active, so it leads these composite indexes.
+# Keyset lists (`is_active = ? ORDER BY id`) and the conditional-GET validators
+# (id, updated_at, created_at of the page's rows) are both answered from this
+# index alone.
+def active_rows_index(table_name):
+    return Index(f"ix_{table_name}_is_active", "is_active", "id", "updated_at", "created_at")
+
+# An employee's rows; the rowid is the implicit trailing key, so
+# `employee_id = ? AND is_active = ? ORDER BY id` needs no sort.
+def employee_rows_index(table_name):
+    return Index(f"ix_{table_name}_employee_id_is_active", "employee_id", "is_active")
+
+# Lists kept in the baseline's order (account_type, start_date descending): the
+# keyset walks this index instead of sorting every active row per page
+def sorted_rows_index(table_name, column):
+    return Index(f"ix_{table_name}_is_active_{column}", "is_active", column, "id")
+
 class User(Base):
     __tablename__ = "tbl_users"
 
@@ -27,6 +44,7 @@ class User(Base):
 
 class Company(Base):
     __tablename__ = "companies"
+    __table_args__ = (active_rows_index("companies"),)
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False, index=True)
@@ -95,6 +113,7 @@ class Department(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (active_rows_index("projects"),)
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False, index=True)
@@ -178,6 +197,7 @@ class DocumentType(Base):
 
 class Employee(Base):
     __tablename__ = "employees"
+    __table_args__ = (active_rows_index("employees"),)
 
     id = Column(Integer, primary_key=True)
     profile_picture = Column(String)
@@ -218,9 +238,9 @@ class Employee(Base):
     emergency_contact_phone = Column(String)
     employee_code = Column(String, unique=True, index=True)
     official_email = Column(String, unique=True, nullable=True, index=True)
-    date_of_joining = Column(DateTime)
+    date_of_joining = Column(DateTime, index=True)
     rejoin_date = Column(DateTime, default=None)
-    date_of_leaving = Column(DateTime, default=None)
+    date_of_leaving = Column(DateTime, default=None, index=True)
     reason_of_leaving = Column(String,default=None)
     relieving_certificate_file = Column(String, nullable=True)
     probation_period_months = Column(Integer, default=3)
@@ -237,6 +257,16 @@ class Employee(Base):
         back_populates="employee",
         foreign_keys="[EmployeeProfile.employee_id]"
     )
+    # the current profile; create_employeeprofile keeps at most one active per employee
+    profile = relationship(
+        "EmployeeProfile",
+        primaryjoin="and_(Employee.id == EmployeeProfile.employee_id, EmployeeProfile.is_active == True)",
+        uselist=False,
+        viewonly=True
+    )
+    documents = relationship("Document", back_populates="employee")
+    work_experiences = relationship("WorkExperience", back_populates="employee")
+    educations = relationship("Education", back_populates="employee")
 
     def __str__(self):
         return self.name
@@ -250,6 +280,16 @@ class Employee(Base):
 
 class EmployeeProfile(Base):
     __tablename__ = "employee_profiles"
+    __table_args__ = (
+        active_rows_index("employee_profiles"),
+        employee_rows_index("employee_profiles"),
+        # /employees?branch_id=... and friends select employee ids from active profiles
+        Index("ix_employee_profiles_branch_id_is_active", "branch_id", "is_active", "employee_id"),
+        Index("ix_employee_profiles_department_id_is_active", "department_id", "is_active", "employee_id"),
+        Index("ix_employee_profiles_grade_id_is_active", "grade_id", "is_active", "employee_id"),
+        # covers the org chart load (employee_id, reporting_manager_id of every active profile)
+        Index("ix_employee_profiles_is_active_reporting_manager_id", "is_active", "employee_id", "reporting_manager_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
@@ -261,6 +301,8 @@ class EmployeeProfile(Base):
     work_location = Column(String)
     shift_timing = Column(String)
     grade_id = Column(Integer, ForeignKey("grades.id"), nullable=False)
+    # in the unit of the grade's min_salary/max_salary
+    salary = Column(Float, nullable=True)
     effective_date = Column(DateTime, default=func.now())
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -280,6 +322,7 @@ class EmployeeProfile(Base):
 
 class BankDetail(Base):
     __tablename__ = "bank_details"
+    __table_args__ = (active_rows_index("bank_details"), employee_rows_index("bank_details"), sorted_rows_index("bank_details", "account_type"))
 
     id = Column(Integer, primary_key=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
@@ -301,6 +344,12 @@ class BankDetail(Base):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        active_rows_index("documents"),
+        employee_rows_index("documents"),
+        # /employeedocuments/expiring and the expiry sweep read a date range of active documents
+        Index("ix_documents_is_active_expiry_date", "is_active", "expiry_date"),
+    )
 
     id = Column(Integer, primary_key=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
@@ -314,14 +363,43 @@ class Document(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     IP = Column(String)
 
-    employee = relationship("Employee")
+    employee = relationship("Employee", back_populates="documents")
     document_type = relationship("DocumentType")
 
     def __str__(self):
         return f'{self.document_type.name} of {self.employee.name}'
 
+# Counts of active documents per type and expiry bucket, rebuilt by the expiry sweep (app/expiry.py)
+class DocumentExpiryBucket(Base):
+    __tablename__ = "document_expiry_buckets"
+
+    id = Column(Integer, primary_key=True)
+    document_type_id = Column(Integer, ForeignKey("document_types.id"), nullable=False)
+    bucket = Column(String, nullable=False)
+    documents = Column(Integer, nullable=False)
+    as_of = Column(Date, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    document_type = relationship("DocumentType")
+
+# Headcount per combination of profile dimensions, kept current by the handlers (app/analytics.py)
+class HeadcountCell(Base):
+    __tablename__ = "headcount_cells"
+    __table_args__ = (
+        UniqueConstraint("branch_id", "department_id", "designation_id", "grade_id", "employee_type_id", name="uq_headcount_cells_dimensions"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=False)
+    designation_id = Column(Integer, ForeignKey("designations.id"), nullable=False)
+    grade_id = Column(Integer, ForeignKey("grades.id"), nullable=False)
+    employee_type_id = Column(Integer, ForeignKey("employee_types.id"), nullable=False)
+    headcount = Column(Integer, nullable=False, default=0)
+
 class WorkExperience(Base):
     __tablename__ = "work_experiences"
+    __table_args__ = (active_rows_index("work_experiences"), employee_rows_index("work_experiences"), sorted_rows_index("work_experiences", "start_date"))
 
     id = Column(Integer, primary_key=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
@@ -335,13 +413,14 @@ class WorkExperience(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     IP = Column(String)
 
-    employee = relationship("Employee")
+    employee = relationship("Employee", back_populates="work_experiences")
 
     def __str__(self):
         return f'Work Experience of {self.employee.name} at {self.company_name}'
 
 class Education(Base):
     __tablename__ = "educations"
+    __table_args__ = (active_rows_index("educations"), employee_rows_index("educations"), sorted_rows_index("educations", "start_date"))
 
     id = Column(Integer, primary_key=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
@@ -358,7 +437,7 @@ class Education(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     IP = Column(String)
 
-    employee = relationship("Employee")
+    employee = relationship("Employee", back_populates="educations")
 
     def __str__(self):
         return f'Education of {self.employee.name} at {self.institution_name}'
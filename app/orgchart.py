@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+from .models import Employee, EmployeeProfile
+
+# The reporting graph (active profiles of active employees) is small compared to the rest of the
+# data: one (employee_id, manager_id) pair per employee. It is loaded with a single
+# query and then kept current by the profile handlers, so subtree / chain / headcount
+# questions never need one query per level. The TTL covers writes made by other
+# worker processes.
+ORG_CHART_TTL = float(os.getenv("ORG_CHART_TTL", 300))
+
+
+class ReportingCycle(ValueError):
+    pass
+
+
+def _manager(employee_id, manager_id):
+    # reporting_manager_id is required, so the top of the chart reports to itself
+    return None if manager_id == employee_id else manager_id
+
+
+class OrgChart:
+    def __init__(self, ttl=ORG_CHART_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._manager_of = None
+        self._reports = None
+        self._loaded_at = 0.0
+
+    def _ensure_loaded(self, db):
+        # Called with the lock held, and the caller walks the graph under that same
+        # hold, so an invalidate() can't empty it between the check and the walk
+        if self._manager_of is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        manager_of, reports = {}, defaultdict(set)
+        rows = (
+            db.query(EmployeeProfile.employee_id, EmployeeProfile.reporting_manager_id)
+            .join(Employee, Employee.id == EmployeeProfile.employee_id)
+            .filter(EmployeeProfile.is_active == True, Employee.is_active == True)
+        )
+        for employee_id, manager_id in rows:
+            manager_id = _manager(employee_id, manager_id)
+            manager_of[employee_id] = manager_id
+            if manager_id is not None:
+                reports[manager_id].add(employee_id)
+        self._manager_of, self._reports, self._loaded_at = manager_of, reports, time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._manager_of = None
+            self._reports = None
+
+    def _walk_down(self, employee_id, max_depth=None):
+        # Breadth-first, so results come out level by level
+        seen = {employee_id}
+        queue = deque([(employee_id, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for report in sorted(self._reports.get(current, ())):
+                if report not in seen:
+                    seen.add(report)
+                    queue.append((report, depth + 1))
+                    yield report, depth + 1
+
+    def subtree(self, db, employee_id, max_depth=None):
+        with self._lock:
+            self._ensure_loaded(db)
+            return list(self._walk_down(employee_id, max_depth))
+
+    def chain(self, db, employee_id):
+        """Managers of employee_id from the direct manager up to the top."""
+        with self._lock:
+            self._ensure_loaded(db)
+            chain, seen = [], {employee_id}
+            manager_id = self._manager_of.get(employee_id)
+            while manager_id is not None and manager_id not in seen:
+                chain.append(manager_id)
+                seen.add(manager_id)
+                manager_id = self._manager_of.get(manager_id)
+            return chain
+
+    def stats(self, db, employee_id):
+        with self._lock:
+            self._ensure_loaded(db)
+            subtree = list(self._walk_down(employee_id))
+            return {
+                "employee_id": employee_id,
+                "manager_id": self._manager_of.get(employee_id),
+                "direct_reports": len(self._reports.get(employee_id, ())),
+                "headcount": len(subtree),
+                "levels_below": max((depth for _, depth in subtree), default=0),
+                "depth": len(self.chain(db, employee_id)),
+            }
+
+    def check_manager(self, db, employee_id, manager_id):
+        if _manager(employee_id, manager_id) is None:
+            return
+        with self._lock:
+            self._ensure_loaded(db)
+            if any(report == manager_id for report, _ in self._walk_down(employee_id)):
+                raise ReportingCycle("Reporting manager already reports to this employee")
+
+    def set_manager(self, employee_id, manager_id):
+        manager_id = _manager(employee_id, manager_id)
+        with self._lock:
+            if self._manager_of is None:
+                return
+            previous = self._manager_of.get(employee_id)
+            if previous is not None:
+                self._reports[previous].discard(employee_id)
+            self._manager_of[employee_id] = manager_id
+            if manager_id is not None:
+                self._reports[manager_id].add(employee_id)
+
+    def remove(self, employee_id):
+        with self._lock:
+            if self._manager_of is None or employee_id not in self._manager_of:
+                return
+            previous = self._manager_of.pop(employee_id)
+            if previous is not None:
+                self._reports[previous].discard(employee_id)
+
+
+org_chart = OrgChart()
@@ -0,0 +1,137 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Generic, Optional, TypeVar
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import and_, tuple_
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor_values(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor_values(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def encode_cursor(last_id: int) -> str:
+    return encode_cursor_values({"id": last_id})
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(decode_cursor_values(cursor)["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    return {"limit": limit, "cursor": cursor}
+
+
+def _decode_sort_cursor(cursor, column):
+    values = decode_cursor_values(cursor)
+    try:
+        value, last_id = values["value"], int(values["id"])
+        if value is not None:
+            kind = column.type.python_type
+            value = kind.fromisoformat(value) if kind in (date, datetime) else kind(value)
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, last_id
+
+
+def _encode_sort_cursor(row, column):
+    value = getattr(row, column.key)
+    return encode_cursor_values({"value": value.isoformat() if isinstance(value, (date, datetime)) else value, "id": row.id})
+
+
+def _sort_ranges(model, column, cursor, descending):
+    """The where-clauses to read in turn for a page sorted on (column, id): the
+    values, then the NULLs when descending (the reverse ascending), which is
+    SQLite's own NULL order. Each is one index range, so the seek stays cheap."""
+    values, nulls = column.isnot(None), column.is_(None)
+    if cursor is None:
+        return [values, nulls] if descending else [nulls, values]
+    value, last_id = _decode_sort_cursor(cursor, column)
+    if descending:
+        if value is None:
+            return [and_(nulls, model.id < last_id)]
+        return [and_(values, tuple_(column, model.id) < (value, last_id)), nulls]
+    if value is None:
+        return [and_(nulls, model.id > last_id), values]
+    return [and_(values, tuple_(column, model.id) > (value, last_id))]
+
+
+def _sort_order(model, column, descending):
+    columns = (model.id,) if column is None else (column, model.id)
+    return tuple(c.desc() if descending else c.asc() for c in columns)
+
+
+def _page(rows, limit, order_by):
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.id) if order_by is None else _encode_sort_cursor(last, order_by)
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+
+def keyset_paginate(query, model, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None, descending: bool = False, order_by=None):
+    # Keyset on the primary key: ids are assigned in insertion order, so this is
+    # also created_at order, and the seek stays an index range scan at any depth.
+    # order_by sorts by that column first (id breaks ties); the cursor carries both.
+    order = _sort_order(model, order_by, descending)
+    if order_by is None:
+        if cursor:
+            last_id = decode_cursor(cursor)
+            query = query.filter(model.id < last_id if descending else model.id > last_id)
+        return _page(query.order_by(*order).limit(limit + 1).all(), limit, None)
+    rows = []
+    for where in _sort_ranges(model, order_by, cursor, descending):
+        rows += query.filter(where).order_by(*order).limit(limit + 1 - len(rows)).all()
+        if len(rows) > limit:
+            break
+    return _page(rows, limit, order_by)
+
+
+async def keyset_paginate_async(db, stmt, model, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None, descending: bool = False, scalars: bool = True, order_by=None):
+    order = _sort_order(model, order_by, descending)
+    if order_by is None:
+        if cursor:
+            last_id = decode_cursor(cursor)
+            stmt = stmt.where(model.id < last_id if descending else model.id > last_id)
+        ranges = [None]
+    else:
+        ranges = _sort_ranges(model, order_by, cursor, descending)
+    rows = []
+    for where in ranges:
+        ranged = stmt if where is None else stmt.where(where)
+        # scalars=False for column selects, which come back as rows rather than entities
+        result = await db.execute(ranged.order_by(*order).limit(limit + 1 - len(rows)))
+        rows += (result.scalars() if scalars else result).all()
+        if len(rows) > limit:
+            break
+    return _page(rows, limit, order_by)
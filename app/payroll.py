@@ -0,0 +1,149 @@
+from itertools import chain
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from .analytics import DIMENSIONS, in_headcount
+from .models import Employee, EmployeeProfile, Grade
+
+try:
+    import numpy as np
+except ImportError:  # the payroll endpoints answer 503
+    np = None
+
+# Workforce-wide salary figures: the active profiles and their grade bands are
+# read with one query into a PayrollFrame, one array per column, and every
+# rollup, band check and raise scenario is then whole-array arithmetic.
+# Salary and the grade's min_salary/max_salary are in the same unit; a grade
+# whose max_salary is still 0 has no band and is skipped by the band checks.
+PAYROLL_COLUMNS = ("employee_id", *(f"{name}_id" for name in DIMENSIONS), "salary", "min_salary", "max_salary")
+
+
+def payroll_statement():
+    return (
+        select(
+            EmployeeProfile.employee_id,
+            *(getattr(EmployeeProfile, f"{name}_id") for name in DIMENSIONS),
+            EmployeeProfile.salary, Grade.min_salary, Grade.max_salary,
+        )
+        .join(Employee, Employee.id == EmployeeProfile.employee_id)
+        .join(Grade, Grade.id == EmployeeProfile.grade_id)
+        .where(in_headcount())
+    )
+
+
+def load_payroll(db):
+    if np is None:
+        raise HTTPException(status_code=503, detail="Payroll computations need numpy installed")
+    return PayrollFrame(db.execute(payroll_statement()).all())
+
+
+def _money(value):
+    return round(float(value), 2)
+
+
+class PayrollFrame:
+    def __init__(self, rows):
+        # One flat list: converting Row objects one by one is ~30x slower. None (no
+        # salary recorded) becomes NaN, which compares False, so those rows never
+        # count as band violations and add nothing to costs.
+        data = np.array(list(chain.from_iterable(rows)), dtype=np.float64).reshape(len(rows), len(PAYROLL_COLUMNS))
+        self.ids = {name: data[:, i].astype(np.int64) for i, name in enumerate(PAYROLL_COLUMNS[:-3])}
+        self.salary, self.min_salary, self.max_salary = data[:, -3], data[:, -2], data[:, -1]
+        self.priced = ~np.isnan(self.salary)
+        self.banded = self.priced & (self.max_salary > 0)
+
+    def __len__(self):
+        return len(self.salary)
+
+    def _groups(self, by):
+        # (keys of each group, group index of each row)
+        if not by:
+            return np.zeros((1, 0), dtype=np.int64), np.zeros(len(self), dtype=np.int64)
+        # factorize each dimension, then group on one combined code: much faster than np.unique(axis=0)
+        values, codes = zip(*(np.unique(self.ids[f"{name}_id"], return_inverse=True) for name in by))
+        shape = tuple(len(unique) for unique in values)
+        try:
+            combined = np.ravel_multi_index(codes, shape)
+        except ValueError:  # too many combinations for one int64 code
+            keys = np.column_stack([self.ids[f"{name}_id"] for name in by])
+            groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+            return groups, inverse.ravel()
+        combined, inverse = np.unique(combined, return_inverse=True)
+        groups = np.column_stack([unique[code] for unique, code in zip(values, np.unravel_index(combined, shape))])
+        return groups, inverse
+
+    def _sums(self, inverse, size, values):
+        return np.bincount(inverse, weights=np.where(self.priced, values, 0.0), minlength=size)
+
+    def cost(self, by=()):
+        """Headcount and salary cost per group of the given dimensions."""
+        groups, inverse = self._groups(by)
+        employees = np.bincount(inverse, minlength=len(groups))
+        priced = np.bincount(inverse, weights=self.priced, minlength=len(groups))
+        cost = self._sums(inverse, len(groups), self.salary)
+        keys = [f"{name}_id" for name in by]
+        rows = [
+            {**dict(zip(keys, group)), "employees": int(count), "priced": int(with_salary), "cost": _money(total)}
+            for group, count, with_salary, total in zip(groups.tolist(), employees, priced, cost)
+            if count
+        ]
+        return {"by": list(by), "employees": len(self), "cost": _money(cost.sum()), "groups": rows}
+
+    def band_violations(self, limit=50):
+        """Salaries outside their grade's band, largest gap first, with counts per grade."""
+        below = self.banded & (self.salary < self.min_salary)
+        above = self.banded & (self.salary > self.max_salary)
+        outside = np.flatnonzero(below | above)
+        gap = np.where(below, self.salary - self.min_salary, self.salary - self.max_salary)[outside]
+        if len(outside) > limit:
+            top = np.argpartition(-np.abs(gap), limit - 1)[:limit]
+        else:
+            top = np.arange(len(outside))
+        top = top[np.argsort(-np.abs(gap[top]), kind="stable")]
+        grades, inverse = np.unique(self.ids["grade_id"][outside], return_inverse=True)
+        below_by_grade = np.bincount(inverse, weights=below[outside], minlength=len(grades))
+        items = [
+            {
+                "employee_id": int(self.ids["employee_id"][row]), "grade_id": int(self.ids["grade_id"][row]),
+                "salary": _money(self.salary[row]), "min_salary": _money(self.min_salary[row]),
+                "max_salary": _money(self.max_salary[row]), "gap": _money(row_gap),
+            }
+            for row, row_gap in zip(outside[top].tolist(), gap[top].tolist())
+        ]
+        by_grade = [
+            {"grade_id": grade, "below": int(under), "above": int(count - under)}
+            for grade, count, under in zip(grades.tolist(), np.bincount(inverse, minlength=len(grades)), below_by_grade)
+        ]
+        return {
+            "checked": int(self.banded.sum()), "below": int(below.sum()), "above": int(above.sum()),
+            "by_grade": by_grade, "items": items,
+        }
+
+    def raise_scenario(self, percent=0.0, grade_percent=None, cap_to_band=False, by=()):
+        """Cost before and after raising salaries by percent (or a per-grade percent)."""
+        rate = np.full(len(self), percent, dtype=np.float64)
+        for grade_id, grade_rate in (grade_percent or {}).items():
+            rate[self.ids["grade_id"] == grade_id] = grade_rate
+        projected = self.salary * (1 + rate / 100)
+        if cap_to_band:
+            # a raise stops at the band's top; salaries already above it aren't cut
+            ceiling = np.where(self.banded, np.maximum(self.max_salary, self.salary), np.inf)
+            projected = np.minimum(projected, ceiling)
+        groups, inverse = self._groups(by)
+        current = self._sums(inverse, len(groups), self.salary)
+        after = self._sums(inverse, len(groups), projected)
+        employees = np.bincount(inverse, minlength=len(groups))
+        keys = [f"{name}_id" for name in by]
+        rows = [
+            {**dict(zip(keys, group)), "employees": int(count), "current_cost": _money(before), "projected_cost": _money(new), "increase": _money(new - before)}
+            for group, count, before, new in zip(groups.tolist(), employees, current, after)
+            if count
+        ]
+        return {
+            "by": list(by), "employees": len(self),
+            "current_cost": _money(current.sum()), "projected_cost": _money(after.sum()),
+            "increase": _money(after.sum() - current.sum()),
+            "above_band": int((self.banded & (projected > self.max_salary)).sum()),
+            "groups": rows,
+        }
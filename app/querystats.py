@@ -0,0 +1,90 @@
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+DB_QUERY_STATS = os.getenv("DB_QUERY_STATS", "true").lower() in ("1", "true", "yes")
+# Warn when one statement shape runs this many times within a single request
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", 10))
+
+_current = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        # bound parameters are placeholders, so the SQL text is the statement shape
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold=DB_N_PLUS_ONE_THRESHOLD):
+        return [(statement, count) for statement, count in self.shapes.most_common() if count >= threshold]
+
+
+def current_query_stats():
+    return _current.get()
+
+
+def instrument_engine(engine):
+    # Sync handlers run in the threadpool with a copy of the request's context, so
+    # the QueryStats object set by the middleware is visible there too
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+
+class QueryStatsMiddleware:
+    """Counts the SQL statements each request issues.
+
+    Adds a Server-Timing header (db and app durations, query count) and logs a
+    warning when a statement shape repeats DB_N_PLUS_ONE_THRESHOLD times or more.
+    """
+
+    def __init__(self, app, threshold=DB_N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", (
+                    f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries", '
+                    f"app;dur={(time.perf_counter() - started) * 1000:.2f}"
+                ))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            for statement, count in stats.repeated(self.threshold):
+                logger.warning(
+                    "Possible N+1 on %s %s: statement ran %d times (%d queries, %.1f ms total): %s",
+                    scope["method"], getattr(scope.get("route"), "path", scope["path"]), count, stats.count, stats.seconds * 1000, " ".join(statement.split())[:200],
+                )
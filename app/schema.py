@@ -0,0 +1,99 @@
+import os
+import time
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+
+from .database import Base
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+# Run "alembic upgrade head" on startup when the database is behind. Off by default:
+# with several workers booting at once, migrations should be a deploy step.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+# The schema of the first migration: what create_all made before the app was under
+# Alembic, so a database without alembic_version is stamped here and upgraded.
+BASELINE_REVISION = "7a2d90cc58d5"
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    return Config(ALEMBIC_INI)
+
+
+def alembic_heads():
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory.from_config(_alembic_config()).get_heads())
+
+
+def current_revisions(connection):
+    from alembic.runtime.migration import MigrationContext
+
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def _create_all(engine):
+    try:
+        Base.metadata.create_all(bind=engine)
+    except OperationalError:
+        # another worker created the same tables between our existence check and CREATE
+        Base.metadata.create_all(bind=engine)
+
+
+def ensure_schema(engine):
+    """Check the database against the Alembic head once at startup.
+
+    current    -> nothing else to do, no table reflection
+    empty DB   -> create_all from the models and stamp head
+    unmanaged  -> (tables but no alembic_version) stamp BASELINE_REVISION and upgrade
+                  when DB_AUTO_MIGRATE is set, otherwise refuse to start
+    behind     -> upgrade when DB_AUTO_MIGRATE is set, otherwise refuse to start
+    """
+    started = time.perf_counter()
+    heads = alembic_heads()
+    with engine.connect() as connection:
+        current = current_revisions(connection)
+        has_tables = bool(current) or bool(inspect(connection).get_table_names())
+
+    if current == heads:
+        status = "current"
+    elif not has_tables:
+        from alembic import command
+
+        _create_all(engine)
+        with engine.begin() as connection:
+            config = _alembic_config()
+            config.attributes["connection"] = connection
+            command.stamp(config, "head")
+        status = "created"
+    elif DB_AUTO_MIGRATE:
+        from alembic import command
+
+        with engine.begin() as connection:
+            config = _alembic_config()
+            config.attributes["connection"] = connection
+            if not current:
+                # create_all never adds columns to existing tables; the migrations do
+                command.stamp(config, BASELINE_REVISION)
+            command.upgrade(config, "head")
+        status = "migrated"
+    elif not current:
+        raise SchemaOutOfDate(
+            f"Database has no alembic_version. Run 'alembic stamp {BASELINE_REVISION} && alembic upgrade head' "
+            "or set DB_AUTO_MIGRATE=true."
+        )
+    else:
+        raise SchemaOutOfDate(
+            f"Database is at revision {sorted(current)}, code expects {sorted(heads)}. Run 'alembic upgrade head' or set DB_AUTO_MIGRATE=true."
+        )
+
+    return {
+        "status": status,
+        "revision": sorted(heads),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
@@ -0,0 +1,77 @@
+from fastapi import HTTPException
+from sqlalchemy import event, text
+
+from .models import Employee
+from .pagination import DEFAULT_PAGE_SIZE, decode_cursor_values, encode_cursor_values
+
+# External-content FTS5 index over employees: the text lives only in the employees
+# table, employees_fts holds just the inverted index and is kept in sync by triggers
+# (so bulk core inserts are covered too, not only ORM flushes).
+SEARCH_COLUMNS = [
+    "name", "father_name", "mother_name", "employee_code", "email",
+    "official_email", "phone", "current_city", "permanent_city",
+]
+
+_columns = ", ".join(SEARCH_COLUMNS)
+_new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+_old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+
+SEARCH_INDEX_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5({_columns}, "
+    f"content='employees', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS employees_fts_ai AFTER INSERT ON employees BEGIN "
+    f"INSERT INTO employees_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS employees_fts_ad AFTER DELETE ON employees BEGIN "
+    f"INSERT INTO employees_fts(employees_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS employees_fts_au AFTER UPDATE OF {_columns} ON employees BEGIN "
+    f"INSERT INTO employees_fts(employees_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO employees_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+]
+
+
+def create_employee_search_index(connection):
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'employees_fts'")).first()
+    for statement in SEARCH_INDEX_DDL:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        connection.exec_driver_sql("INSERT INTO employees_fts(employees_fts) VALUES ('rebuild')")
+
+
+@event.listens_for(Employee.__table__, "after_create")
+def _create_search_index_with_table(target, connection, **kw):
+    create_employee_search_index(connection)
+
+
+def fts_query(q):
+    # Every word becomes a quoted prefix term, so user input can't hit FTS5 syntax
+    terms = ['"{}"*'.format(word.replace('"', '""')) for word in q.split()]
+    return " ".join(terms)
+
+
+def search_employee_ids(db, q, limit=DEFAULT_PAGE_SIZE, cursor=None, is_active=True):
+    match = fts_query(q)
+    if not match:
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    params = {"match": match, "is_active": is_active, "limit": limit + 1}
+    seek = ""
+    if cursor:
+        values = decode_cursor_values(cursor)
+        try:
+            params["rank"], params["id"] = float(values["rank"]), int(values["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # keyset on (rank, id): bm25 ranks are negative, best match first
+        seek = "AND (employees_fts.rank > :rank OR (employees_fts.rank = :rank AND employees.id > :id))"
+    rows = db.execute(text(
+        "SELECT employees.id, employees_fts.rank FROM employees_fts "
+        "JOIN employees ON employees.id = employees_fts.rowid "
+        f"WHERE employees_fts MATCH :match AND employees.is_active = :is_active {seek} "
+        "ORDER BY employees_fts.rank, employees.id LIMIT :limit"
+    ), params).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last_id, last_rank = rows[limit - 1]
+        next_cursor = encode_cursor_values({"rank": last_rank, "id": last_id})
+    return [row[0] for row in rows[:limit]], next_cursor
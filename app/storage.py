@@ -0,0 +1,194 @@
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Uploaded files are stored once per content: <UPLOAD_DIR>/ab/cd/<sha256>. The
+# request body is parsed as it arrives and each chunk goes straight to a temp
+# file and the hash, so nothing is buffered whole in memory or spooled twice;
+# the temp file is then renamed onto its digest (or dropped if already stored).
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+MAX_FORM_FIELD_BYTES = 64 * 1024
+FILES_PATH = "/files"
+# content behind a digest never changes
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+_DIGEST = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]{1,10})?$")
+
+# multipart/form-data body with one file part, for routes that read the stream themselves
+def upload_request_body(**fields):
+    properties = {"file": {"type": "string", "format": "binary"}, **fields}
+    schema = {"type": "object", "properties": properties, "required": list(properties)}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": schema}}}}
+
+
+class StoredFile(NamedTuple):
+    sha256: str
+    size: int
+    filename: Optional[str]
+    content_type: Optional[str]
+    created: bool
+
+    @property
+    def reference(self):
+        return file_reference(self.sha256, self.filename)
+
+
+def file_reference(digest, filename):
+    # the value kept in Document.document_file, Employee.profile_picture, ...: its download URL
+    extension = os.path.splitext(filename or "")[1].lower()
+    if not re.fullmatch(r"\.[a-z0-9]{1,10}", extension):
+        extension = ""
+    return f"{FILES_PATH}/{digest}{extension}"
+
+
+def reference_digest(name):
+    """The sha256 of a stored reference name ("<sha256>[.ext]"), or None."""
+    match = _DIGEST.match(name)
+    return match.group(1) if match else None
+
+
+def blob_path(digest):
+    return os.path.join(UPLOAD_DIR, digest[:2], digest[2:4], digest)
+
+
+class _BlobWriter:
+    def __init__(self):
+        tmp_dir = os.path.join(UPLOAD_DIR, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+        self.hash = hashlib.sha256()
+
+    def write(self, chunks):
+        for chunk in chunks:
+            self.hash.update(chunk)
+            self.file.write(chunk)
+
+    def commit(self):
+        self.file.close()
+        digest = self.hash.hexdigest()
+        path = blob_path(digest)
+        if os.path.exists(path):
+            os.unlink(self.file.name)
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.file.name, path)
+        return digest, True
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.file.name):
+            os.unlink(self.file.name)
+
+
+async def receive_upload(request: Request, file_field="file", validate=None):
+    """Stream a multipart/form-data body: the file part is stored, other parts are returned as strings.
+
+    validate(fields, reference) runs once the body is read but before the file is
+    stored, and its result is returned in place of fields; whatever it raises
+    rejects the upload and the file is dropped."""
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=415, detail="Expected a multipart/form-data body")
+
+    fields = {}
+    part = {}
+    headers = {}
+    pending = []
+    state = {"header_field": b"", "header_value": b"", "writer": None, "filename": None, "content_type": None, "size": 0}
+
+    def on_part_begin():
+        part.clear()
+        headers.clear()
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        headers[state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = state["header_value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+        part["name"] = disposition.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" not in disposition:
+            part["value"] = bytearray()
+            return
+        if part["name"] != file_field or state["writer"] is not None:
+            raise HTTPException(status_code=400, detail=f"Expected a single file in the '{file_field}' field")
+        state["filename"] = disposition[b"filename"].decode("utf-8", "replace")
+        state["content_type"] = headers.get(b"content-type", b"").decode("latin-1") or None
+        state["writer"] = part["writer"] = _BlobWriter()
+
+    def on_part_data(data, start, end):
+        if "writer" in part:
+            state["size"] += end - start
+            if state["size"] > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail=f"File exceeds {MAX_UPLOAD_BYTES} bytes")
+            pending.append(bytes(data[start:end]))
+        else:
+            part["value"] += data[start:end]
+            if len(part["value"]) > MAX_FORM_FIELD_BYTES:
+                raise HTTPException(status_code=413, detail=f"Form field '{part['name']}' is too large")
+
+    def on_part_end():
+        if "value" in part:
+            try:
+                fields[part["name"]] = part["value"].decode("utf-8")
+            except UnicodeDecodeError:
+                raise HTTPException(status_code=400, detail=f"Form field '{part['name']}' is not valid UTF-8")
+
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if pending:
+                # disk writes and hashing off the event loop, once per received chunk
+                await run_in_threadpool(state["writer"].write, pending[:])
+                pending.clear()
+        parser.finalize()
+        if state["writer"] is None:
+            raise HTTPException(status_code=400, detail=f"Missing file field '{file_field}'")
+        if validate is not None:
+            fields = validate(fields, file_reference(state["writer"].hash.hexdigest(), state["filename"]))
+        digest, created = await run_in_threadpool(state["writer"].commit)
+    except BaseException as exc:
+        if state["writer"] is not None:
+            await run_in_threadpool(state["writer"].discard)
+        if isinstance(exc, FormParserError):
+            raise HTTPException(status_code=400, detail="Malformed multipart body") from exc
+        raise
+    return fields, StoredFile(digest, state["size"], state["filename"], state["content_type"], created)
+
+
+def file_response(name):
+    """FileResponse for a stored reference name ("<sha256>[.ext]"): sendfile/pathsend where
+    the server supports it, Range requests, and caching forever since content never changes."""
+    digest = reference_digest(name)
+    if digest is None or not os.path.isfile(blob_path(digest)):
+        raise HTTPException(status_code=404, detail="File not found")
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    return FileResponse(blob_path(digest), media_type=media_type, headers={
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "ETag": f'"{digest}"',
+    })
@@ -0,0 +1,65 @@
+from fastapi import HTTPException
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.exc import IntegrityError
+
+
+class UniqueFields:
+    """Duplicate checks for a model's unique columns in a single query.
+
+    check() asks for every field present in data at once
+    (`WHERE a = ? OR b = ?`, one flag per field) and raises the 400 for the
+    first taken field in declaration order. commit() maps an IntegrityError
+    from a concurrent writer that slipped in after the check to the same
+    message. messages overrides the default "<label> with this <field> already
+    exists" per field and may use {value}.
+    """
+
+    def __init__(self, model, label, fields=None, messages=None):
+        self.model = model
+        self.label = label
+        self.fields = tuple(fields or (name for name, column in model.__table__.columns.items() if column.unique))
+        self.messages = messages or {}
+
+    def message(self, field, value):
+        template = self.messages.get(field, f"{self.label} with this {field.replace('_', ' ')} already exists")
+        return template.format(value=value)
+
+    def statement(self, data, exclude_id=None, where=()):
+        clauses = {field: getattr(self.model, field) == data[field] for field in self.fields if data.get(field) is not None}
+        if not clauses:
+            return None, ()
+        stmt = select(*(func.max(case((clause, 1), else_=0)) for clause in clauses.values())).where(or_(*clauses.values()), *where)
+        if exclude_id is not None:
+            stmt = stmt.where(self.model.id != exclude_id)
+        return stmt, tuple(clauses)
+
+    def _raise_conflict(self, flags, fields, data, message):
+        for field, taken in zip(fields, flags or ()):
+            if taken:
+                raise HTTPException(status_code=400, detail=message or self.message(field, data[field]))
+
+    def check(self, db, data, exclude_id=None, where=(), message=None):
+        stmt, fields = self.statement(data, exclude_id, where)
+        if stmt is not None:
+            self._raise_conflict(db.execute(stmt).first(), fields, data, message)
+
+    def commit(self, db, data, exclude_id=None, message=None):
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            self.check(db, data, exclude_id, message=message)
+            raise
+
+    async def check_async(self, db, data, exclude_id=None, where=(), message=None):
+        stmt, fields = self.statement(data, exclude_id, where)
+        if stmt is not None:
+            self._raise_conflict((await db.execute(stmt)).first(), fields, data, message)
+
+    async def commit_async(self, db, data, exclude_id=None, message=None):
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            await self.check_async(db, data, exclude_id, message=message)
+            raise
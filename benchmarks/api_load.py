@@ -0,0 +1,166 @@
+"""Load test of the HRMS API, driven in-process through the ASGI transport.
+
+    python -m benchmarks.api_load --employees 100000 --concurrency 16 --output results.json
+    python -m benchmarks.api_load --compare results.json     # fail on regressions
+
+A temporary SQLite database is seeded (benchmarks/seed.py), the real app is
+started with its lifespan, and each endpoint gets a fixed number of requests from
+concurrent clients. Per endpoint: requests/s, p50/p95/p99 latency and errors.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ENDPOINTS = ("login", "list", "get", "create", "patch")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, seconds):
+    latencies = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_statuses": {str(status): count for status, count in sorted(errors.items())},
+        "rps": round(len(latencies) / seconds, 1) if seconds else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+    }
+
+
+async def drive(client, make_request, total, concurrency):
+    latencies, errors = [], Counter()
+    remaining = iter(range(total))
+
+    async def worker():
+        for n in remaining:
+            method, url, body = make_request(n)
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                # e.g. 503 from the bcrypt pool's backpressure on login
+                errors[response.status_code] += 1
+            else:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run(args):
+    import httpx
+
+    from app import main
+    from app.database import engine
+    from benchmarks.seed import employee_payload, seed
+
+    rng = random.Random(args.seed)
+    async with main.app.router.lifespan_context(main.app):
+        started = time.perf_counter()
+        seed(engine, args.employees, rng=rng)
+        seed_seconds = round(time.perf_counter() - started, 1)
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            credentials = {"email": "bench@example.com", "password": "bench-password"}
+            await client.post("/register", json={"name": "bench", **credentials})
+            token = (await client.post("/login", json=credentials)).json()["access_token"]
+            client.headers["Authorization"] = f"Bearer {token}"
+
+            next_id = iter(range(args.employees + 1, args.employees + 10 ** 9))
+            requests = {
+                "login": (args.login_requests, lambda n: ("POST", "/login", credentials)),
+                "list": (args.requests, lambda n: ("GET", f"/employees?limit={args.page_size}", None)),
+                "get": (args.requests, lambda n: ("GET", f"/employees/{rng.randint(1, args.employees)}", None)),
+                "create": (args.requests, lambda n: ("POST", "/employees", employee_payload(next(next_id)))),
+                "patch": (args.requests, lambda n: ("PATCH", f"/employees/{rng.randint(1, args.employees)}", {"current_city": f"City {n}"})),
+            }
+            results = {}
+            for name in args.endpoints:
+                total, make_request = requests[name]
+                results[name] = await drive(client, make_request, total, args.concurrency)
+                print(name, json.dumps(results[name]), file=sys.stderr)
+    return seed_seconds, results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current, tolerance):
+    """Endpoints whose p95 grew or rps dropped by more than tolerance."""
+    regressions = []
+    for name, result in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before or not before.get("p95_ms") or not result.get("p95_ms"):
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+        if result["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {before['rps']} -> {result['rps']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint")
+    parser.add_argument("--login-requests", type=int, default=100, help="bcrypt makes login far slower")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # must be set before app.database is imported
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed_seconds, results = asyncio.run(run(args))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "employees": args.employees,
+        "concurrency": args.concurrency,
+        "seed_seconds": seed_seconds,
+        "endpoints": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Payroll engine (app/payroll.py) vs the same computations as a row-by-row loop.
+
+    python -m benchmarks.payroll --employees 10000 100000
+
+For each size a temporary database is seeded and the active profile/grade rows
+are fetched once. Both sides start from those rows:
+
+  loop   per-row Python over the fetched tuples, dicts keyed by group
+  numpy  PayrollFrame built from the rows (included in its time), then array ops;
+         numpy_frame_reused times the array ops alone on an already built frame
+
+and the results are compared, so the speedup is for identical answers.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_db_engine
+from app.payroll import PAYROLL_COLUMNS, PayrollFrame, _money, payroll_statement
+from benchmarks.seed import seed
+
+BY = ("branch", "department")
+SCENARIO = {"percent": 5.0, "grade_percent": {1: 10.0, 2: 8.0}, "cap_to_band": True}
+
+COLUMN = {name: i for i, name in enumerate(PAYROLL_COLUMNS)}
+
+
+def loop_cost(rows, by):
+    keys = [COLUMN[f"{name}_id"] for name in by]
+    groups = defaultdict(lambda: [0, 0, 0.0])
+    for row in rows:
+        group = groups[tuple(row[i] for i in keys)]
+        group[0] += 1
+        if row[COLUMN["salary"]] is not None:
+            group[1] += 1
+            group[2] += row[COLUMN["salary"]]
+    return {key: (count, priced, _money(cost)) for key, (count, priced, cost) in groups.items()}
+
+
+def loop_band_violations(rows):
+    below = above = 0
+    gaps = []
+    for row in rows:
+        salary, low, high = row[COLUMN["salary"]], row[COLUMN["min_salary"]], row[COLUMN["max_salary"]]
+        if salary is None or high <= 0:
+            continue
+        if salary < low:
+            below += 1
+            gaps.append(salary - low)
+        elif salary > high:
+            above += 1
+            gaps.append(salary - high)
+    return below, above, sorted((abs(gap) for gap in gaps), reverse=True)[:50]
+
+
+def loop_raise_scenario(rows, percent, grade_percent, cap_to_band):
+    current = projected = 0.0
+    for row in rows:
+        salary = row[COLUMN["salary"]]
+        if salary is None:
+            continue
+        new = salary * (1 + grade_percent.get(row[COLUMN["grade_id"]], percent) / 100)
+        if cap_to_band and row[COLUMN["max_salary"]] > 0:
+            new = min(new, max(row[COLUMN["max_salary"]], salary))
+        current += salary
+        projected += new
+    return _money(current), _money(projected)
+
+
+def loop_path(rows):
+    return (
+        loop_cost(rows, BY),
+        loop_band_violations(rows),
+        loop_raise_scenario(rows, SCENARIO["percent"], SCENARIO["grade_percent"], SCENARIO["cap_to_band"]),
+    )
+
+
+def numpy_path(rows):
+    return numpy_results(PayrollFrame(rows))
+
+
+def numpy_results(frame):
+    cost = frame.cost(BY)
+    violations = frame.band_violations(50)
+    scenario = frame.raise_scenario(**SCENARIO)
+    return (
+        {(group["branch_id"], group["department_id"]): (group["employees"], group["priced"], group["cost"]) for group in cost["groups"]},
+        (violations["below"], violations["above"], [abs(item["gap"]) for item in violations["items"]]),
+        (scenario["current_cost"], scenario["projected_cost"]),
+    )
+
+
+def same(loop, vectorized):
+    (loop_groups, loop_bands, loop_totals), (np_groups, np_bands, np_totals) = loop, vectorized
+    # summation order differs, so totals may be a cent apart
+    close = lambda a, b: math.isclose(a, b, rel_tol=1e-12, abs_tol=0.011)
+    return (
+        loop_groups.keys() == np_groups.keys()
+        and all(a[:2] == b[:2] and close(a[2], b[2]) for a, b in ((loop_groups[k], np_groups[k]) for k in loop_groups))
+        and loop_bands[:2] == np_bands[:2]
+        and all(close(_money(a), b) for a, b in zip(loop_bands[2], np_bands[2]))
+        and all(close(a, b) for a, b in zip(loop_totals, np_totals))
+    )
+
+
+def timed(func, data, repeat):
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(data)
+        timings.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(timings) * 1000, 1), "min_ms": round(min(timings) * 1000, 1)}, result
+
+
+def run(employees, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        seed(engine, employees, documents_per_employee=0)
+        with sessionmaker(bind=engine)() as db:
+            started = time.perf_counter()
+            rows = db.execute(payroll_statement()).all()
+            fetch_ms = round((time.perf_counter() - started) * 1000, 1)
+        engine.dispose()
+    loop_timing, loop_result = timed(loop_path, rows, repeat)
+    numpy_timing, numpy_result = timed(numpy_path, rows, repeat)
+    frame = PayrollFrame(rows)
+    compute_timing, _ = timed(numpy_results, frame, repeat)
+    return {
+        "employees": len(rows),
+        "fetch_ms": fetch_ms,
+        "loop": loop_timing,
+        "numpy": numpy_timing,
+        "numpy_frame_reused": compute_timing,
+        "speedup": round(loop_timing["median_ms"] / numpy_timing["median_ms"], 2),
+        "speedup_frame_reused": round(loop_timing["median_ms"] / compute_timing["median_ms"], 2),
+        "same_results": same(loop_result, numpy_result),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for employees in args.employees:
+        print(json.dumps(run(employees, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""EXPLAIN QUERY PLAN for the query shapes the API runs, flagging full table scans.
+
+    python -m benchmarks.query_plans --employees 20000
+    python -m benchmarks.query_plans --without-indexes    # the plans before the index migration
+
+The statements are built the way the handlers build them (same filters, same
+keyset ordering) and planned against a seeded, ANALYZEd temporary database.
+Exits 1 if any plan still contains a full scan of a table.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from datetime import date, timedelta
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.database import Base, create_db_engine
+from app.analytics import movement_query
+from app.pagination import _sort_order, _sort_ranges, encode_cursor_values
+from app.expiry import day_start, expiry_counts
+from app.models import (
+    BankDetail, Company, Document, Education, Employee, EmployeeProfile, Project, WorkExperience,
+)
+from benchmarks.seed import seed
+
+SUB_TABLES = (EmployeeProfile, BankDetail, Document, WorkExperience, Education)
+
+
+def _keyset(model, *where, descending=False):
+    order = model.id.desc() if descending else model.id.asc()
+    return select(model).where(model.is_active == True, *where).order_by(order).limit(51)
+
+
+def _validators(model, *where):
+    # the conditional-GET window: the list's page, every column (the ETag hashes them)
+    order = model.id.desc() if model is Document else model.id.asc()
+    return select(*model.__table__.columns).where(model.is_active == True, *where).order_by(order).limit(51)
+
+
+def query_shapes():
+    shapes = {}
+    for model in (Company, Project, Employee) + SUB_TABLES:
+        name = model.__tablename__
+        shapes[f"{name}: list"] = _keyset(model, descending=model is Document)
+        shapes[f"{name}: list after cursor"] = _keyset(model, model.id > 1000)
+        shapes[f"{name}: conditional GET validators"] = _validators(model)
+    for column, value in ((BankDetail.account_type, "savings"), (WorkExperience.start_date, "2020-01-01"), (Education.start_date, "2020-01-01T00:00:00")):
+        name = f"{column.table.name}: list by {column.key} desc"
+        model = column.class_
+        cursor = encode_cursor_values({"value": value, "id": 1000})
+        for label, ranges in (("", _sort_ranges(model, column, None, True)), (" after cursor", _sort_ranges(model, column, cursor, True))):
+            # the first range is the one a page normally reads entirely from
+            shapes[name + label] = select(model).where(model.is_active == True, ranges[0]).order_by(*_sort_order(model, column, True)).limit(51)
+    for model in SUB_TABLES:
+        name = model.__tablename__
+        shapes[f"{name}: list by employee_id"] = _keyset(model, model.employee_id == 42, descending=model is Document)
+        shapes[f"{name}: validators by employee_id"] = _validators(model, model.employee_id == 42)
+        shapes[f"{name}: employee 360 selectinload"] = select(model).where(model.employee_id.in_([42]), model.is_active == True)
+    for column in ("branch_id", "department_id", "grade_id"):
+        profile_ids = select(EmployeeProfile.employee_id).where(EmployeeProfile.is_active == True, getattr(EmployeeProfile, column) == 3)
+        shapes[f"employees: list by profile {column}"] = _keyset(Employee, Employee.id.in_(profile_ids))
+    shapes["employee_profiles: org chart load"] = (
+        select(EmployeeProfile.employee_id, EmployeeProfile.reporting_manager_id)
+        .join(Employee, Employee.id == EmployeeProfile.employee_id)
+        .where(EmployeeProfile.is_active == True, Employee.is_active == True)
+    )
+    shapes["employee_profiles: deactivate previous profile"] = (
+        update(EmployeeProfile).where(EmployeeProfile.employee_id == 42, EmployeeProfile.is_active == True).values(is_active=False)
+    )
+    today = date.today()
+    expiring = select(Document).where(
+        Document.is_active == True, Document.expiry_date >= day_start(today), Document.expiry_date < day_start(today + timedelta(days=31)),
+    )
+    shapes["documents: expiring within 30 days"] = expiring.order_by(Document.expiry_date, Document.id).limit(51)
+    shapes["documents: expiring after cursor"] = (
+        expiring.where(tuple_(Document.expiry_date, Document.id) > (day_start(today), 1000)).order_by(Document.expiry_date, Document.id).limit(51)
+    )
+    shapes["documents: expiry sweep"] = expiry_counts(today)
+    for column in (Employee.date_of_joining, Employee.date_of_leaving):
+        shapes[f"employees: {column.key} by department"] = movement_query(
+            Session(), column, date(2020, 1, 1), date(2020, 3, 31), [EmployeeProfile.department_id],
+        ).statement
+    shapes["employees: unique email check"] = select(Employee.id).where(Employee.email == "employee42@example.com").limit(1)
+    return shapes
+
+
+def is_full_scan(detail):
+    # "SCAN employees" reads the whole table; "SCAN ... USING [COVERING] INDEX" walks an index
+    return detail.startswith("SCAN ") and " USING " not in detail and not detail.startswith("SCAN CONSTANT ROW")
+
+
+def explain(connection, statement):
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+def drop_new_indexes(connection):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if "is_active" in index.name:
+                connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=20000)
+    parser.add_argument("--without-indexes", action="store_true", help="drop the is_active/employee_id indexes first")
+    args = parser.parse_args()
+
+    report, full_scans = {}, []
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'plans.db')}")
+        Base.metadata.create_all(bind=engine)
+        seed(engine, args.employees)
+        with engine.begin() as connection:
+            if args.without_indexes:
+                drop_new_indexes(connection)
+            connection.exec_driver_sql("ANALYZE")
+            for name, statement in query_shapes().items():
+                plan = explain(connection, statement)
+                report[name] = plan
+                full_scans += [f"{name}: {detail}" for detail in plan if is_full_scan(detail)]
+        engine.dispose()
+
+    print(json.dumps(report, indent=2))
+    for line in full_scans:
+        print("FULL SCAN", line, file=sys.stderr)
+    print(f"{len(report)} query shapes, {len(full_scans)} full table scans", file=sys.stderr)
+    if full_scans:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
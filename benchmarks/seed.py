@@ -0,0 +1,96 @@
+"""Realistic HRMS data for the benchmarks.
+
+companies -> branches -> departments, the lookup tables, and employees with an
+active profile, a bank account and documents each. Every column a read schema
+exposes gets a value, so response validation never trips over NULLs.
+"""
+import random
+from datetime import date, datetime, timedelta
+
+from app.models import (
+    BankDetail, Branch, Company, Department, Designation, Document, DocumentType, Employee,
+    EmployeeProfile, EmployeeType, Grade,
+)
+
+BATCH_SIZE = 5000
+
+
+def _value(name, column, i):
+    kind = column.type.python_type
+    if column.unique:
+        return f"{name}-{i}"
+    if kind is bool:
+        return False
+    if kind is int:
+        return 30
+    if kind is float:
+        return 0.0
+    if kind is datetime:
+        return datetime(2020, 1, 1) + timedelta(days=i % 1500)
+    if kind is date:
+        return date(1980, 1, 1) + timedelta(days=i % 9000)
+    return f"{name} {i}"
+
+
+def table_row(model, i, **values):
+    row = {name: _value(name, column, i) for name, column in model.__table__.columns.items()
+           if name not in ("id", "created_at", "updated_at") and not column.foreign_keys}
+    row["is_active"] = True
+    row.update(values)
+    return row
+
+
+def employee_row(i):
+    return table_row(Employee, i, name=f"Employee {i}", email=f"employee{i}@example.com", phone=f"9{i:09d}")
+
+
+def employee_payload(i):
+    """POST /employees body for a new employee (JSON types)."""
+    row = employee_row(i)
+    for key in ("id", "is_active", "IP"):
+        row.pop(key, None)
+    return {key: value.isoformat() if isinstance(value, (date, datetime)) else value for key, value in row.items()}
+
+
+def _insert(conn, model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        conn.execute(model.__table__.insert(), rows[start:start + BATCH_SIZE])
+
+
+def seed(engine, employees, companies=5, branches_per_company=4, departments_per_branch=5,
+         documents_per_employee=2, rng=None):
+    rng = rng or random.Random(42)
+    with engine.begin() as conn:
+        _insert(conn, Company, [table_row(Company, i) for i in range(1, companies + 1)])
+        branch_ids = range(1, companies * branches_per_company + 1)
+        _insert(conn, Branch, [table_row(Branch, i, company_id=(i - 1) // branches_per_company + 1) for i in branch_ids])
+        department_count = len(branch_ids) * departments_per_branch
+        _insert(conn, Department, [table_row(Department, i, branch_id=(i - 1) // departments_per_branch + 1) for i in range(1, department_count + 1)])
+        _insert(conn, Designation, [table_row(Designation, i) for i in range(1, 21)])
+        _insert(conn, EmployeeType, [table_row(EmployeeType, i) for i in range(1, 4)])
+        _insert(conn, Grade, [table_row(Grade, i, min_salary=i * 10000.0, max_salary=i * 10000.0 + 9999) for i in range(1, 11)])
+        _insert(conn, DocumentType, [table_row(DocumentType, i) for i in range(1, 6)])
+
+        for start in range(1, employees + 1, BATCH_SIZE):
+            ids = range(start, min(start + BATCH_SIZE, employees + 1))
+            conn.execute(Employee.__table__.insert(), [employee_row(i) for i in ids])
+            profiles, banks, documents = [], [], []
+            for i in ids:
+                department_id = rng.randint(1, department_count)
+                grade_id = rng.randint(1, 10)
+                profiles.append(table_row(
+                    EmployeeProfile, i, employee_id=i,
+                    # a rough tree: everyone reports to someone hired before them
+                    reporting_manager_id=rng.randint(1, i - 1) if i > 1 else 1,
+                    department_id=department_id,
+                    branch_id=(department_id - 1) // departments_per_branch + 1,
+                    designation_id=rng.randint(1, 20), employee_type_id=rng.randint(1, 3), grade_id=grade_id,
+                    # mostly inside the grade's band, about one in eleven a little below or above it
+                    salary=grade_id * 10000.0 + (i * 7919) % 11000 - 500,
+                ))
+                banks.append(table_row(BankDetail, i, employee_id=i, is_primary=True))
+                for d in range(documents_per_employee):
+                    documents.append(table_row(Document, i * documents_per_employee + d, employee_id=i, document_type_id=rng.randint(1, 5)))
+            _insert(conn, EmployeeProfile, profiles)
+            _insert(conn, BankDetail, banks)
+            _insert(conn, Document, documents)
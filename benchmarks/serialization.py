@@ -0,0 +1,110 @@
+"""List-response serialisation: the default response_model path vs the FAST_JSON path.
+
+    python -m benchmarks.serialization --rows 10000 100000
+
+For each size a temporary database is seeded with fully populated employees and
+one page holding every row is built both ways:
+
+  default  ORM entities -> Page[readEmployee] validation -> stdlib json
+  fast     column rows -> dicts -> orjson (app/serialization.py)
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, datetime
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_db_engine
+from app.main import readEmployee
+from app.models import Employee
+from app.pagination import Page, keyset_paginate
+from app.serialization import fast_page, orjson
+
+
+def seed(engine, rows):
+    Base.metadata.create_all(bind=engine)
+    # every column readEmployee exposes gets a value, so validation never fails on NULLs
+    template = {}
+    for name, column in Employee.__table__.columns.items():
+        kind = column.type.python_type
+        if name == "id":
+            continue
+        elif kind is bool:
+            template[name] = False
+        elif kind is int:
+            template[name] = 30
+        elif kind is datetime:
+            template[name] = datetime(2020, 1, 1)
+        elif kind is date:
+            template[name] = date(1990, 1, 1)
+        else:
+            template[name] = "x"
+    template["is_active"] = True
+    unique = [name for name, column in Employee.__table__.columns.items() if column.unique]
+    with engine.begin() as conn:
+        for start in range(0, rows, 5000):
+            batch = []
+            for i in range(start, min(start + 5000, rows)):
+                row = dict(template)
+                row.update({name: f"{name}-{i}" for name in unique})
+                row["name"] = f"Employee {i}"
+                batch.append(row)
+            conn.execute(Employee.__table__.insert(), batch)
+
+
+def default_path(db, rows):
+    page = keyset_paginate(db.query(Employee).filter(Employee.is_active == True), Employee, limit=rows)
+    adapter = TypeAdapter(Page[readEmployee])
+    validated = adapter.validate_python(page, from_attributes=True)
+    return JSONResponse(content=adapter.dump_python(validated, mode="json")).body
+
+
+def fast_path(db, rows):
+    names = tuple(readEmployee.model_fields)
+    query = db.query(Employee).filter(Employee.is_active == True).with_entities(*[getattr(Employee, name) for name in names])
+    return fast_page(keyset_paginate(query, Employee, limit=rows), readEmployee, names).body
+
+
+def timed(func, session_factory, rows, repeat):
+    timings, size = [], 0
+    for _ in range(repeat):
+        with session_factory() as db:
+            started = time.perf_counter()
+            size = len(func(db, rows))
+            timings.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(timings) * 1000, 1), "min_ms": round(min(timings) * 1000, 1), "bytes": size}
+
+
+def run(rows, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed(engine, rows)
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+        report = {
+            "rows": rows,
+            "orjson": orjson is not None,
+            "default": timed(default_path, session_factory, rows, repeat),
+            "fast": timed(fast_path, session_factory, rows, repeat),
+        }
+        engine.dispose()
+    report["speedup"] = round(report["default"]["median_ms"] / report["fast"]["median_ms"], 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for rows in args.rows:
+        print(json.dumps(run(rows, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Concurrent read/write throughput of the SQLite engine profiles in app/database.py.
+
+    python -m benchmarks.sqlite_profiles --readers 8 --writers 2 --seconds 5
+
+Each profile gets its own temporary database file seeded with employees; reader
+threads fetch random employees by id while writer threads update them and commit.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import Base, SQLITE_PROFILES, create_db_engine
+from app import models  # noqa: F401  (registers the tables on Base.metadata)
+
+
+def seed(engine, rows):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            models.Employee.__table__.insert(),
+            [
+                {"name": f"Employee {i}", "email": f"emp{i}@example.com", "phone": f"9{i:09d}", "is_active": True}
+                for i in range(1, rows + 1)
+            ],
+        )
+
+
+def worker(engine, kind, rows, deadline, results):
+    latencies, errors = [], 0
+    while time.perf_counter() < deadline:
+        employee_id = random.randint(1, rows)
+        started = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                if kind == "read":
+                    conn.execute(text("SELECT * FROM employees WHERE id = :id"), {"id": employee_id}).fetchall()
+                else:
+                    conn.execute(text("UPDATE employees SET age = :age WHERE id = :id"), {"age": random.randint(18, 60), "id": employee_id})
+                    conn.commit()
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    results.append((kind, latencies, errors))
+
+
+def run_profile(profile, readers, writers, seconds, rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile)
+        seed(engine, rows)
+        results = []
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=worker, args=(engine, "read", rows, deadline, results)) for _ in range(readers)]
+        threads += [threading.Thread(target=worker, args=(engine, "write", rows, deadline, results)) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    report = {"profile": profile}
+    for kind in ("read", "write"):
+        latencies = sorted(latency for k, values, _ in results if k == kind for latency in values)
+        errors = sum(e for k, _, e in results if k == kind)
+        report[kind] = {
+            "ops_per_sec": round(len(latencies) / seconds, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 3) if latencies else None,
+            "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3) if latencies else None,
+            "locked_errors": errors,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=list(SQLITE_PROFILES))
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+    for profile in args.profiles:
+        print(json.dumps(run_profile(profile, args.readers, args.writers, args.seconds, args.rows)))
+
+
+if __name__ == "__main__":
+    main()